@@ -0,0 +1 @@
+"""Offline benchmarks and checks on synthetic fixture pages."""
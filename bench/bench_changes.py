@@ -0,0 +1,68 @@
+"""Time the year-over-year change report, full and incremental.
+
+usage: python -m bench.bench_changes [--rows <N>] [--years <N>]
+"""
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+import pandas as pd
+from bikeimport.changes import (ChangeCache, summarize, year_over_year,)
+from bikeimport.storage import (INDEX_KEYS, compact_frame,)
+
+from .synthetic import synthetic_database
+
+
+def model_years_database(rows, years, seed=0):
+    """Return a typed database of the same models in years consecutive
+    years, every year a quarter of the models change their stack."""
+    models = synthetic_database(rows // years, seed=seed,
+                                years=(2020, 2020)).reset_index()
+    rng = np.random.default_rng(seed)
+    frames = []
+    for year in range(2020, 2020 + years):
+        frame = models.copy()
+        frame['year'] = year
+        models['stack'] += np.where(rng.random(len(models.index)) < 0.25,
+                                    5.0, 0.0)
+        frames.append(frame)
+    return compact_frame(pd.concat(frames).set_index(INDEX_KEYS))
+
+
+def measure(func):
+    """Return (result, seconds) of func()."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", dest="rows", type=int, default=1_000_000)
+    parser.add_argument("--years", dest="years", type=int, default=5)
+    a = parser.parse_args()
+
+    db = model_years_database(a.rows, a.years)
+    last = db.index.get_level_values('year') == db.index.levels[2].max()
+    print(f"{len(db.index)} rows, {a.years} model years")
+
+    report, seconds = measure(lambda: year_over_year(db))
+    print(f"{'year_over_year':22} {seconds:8.2f} s  {len(report.index)} sizes")
+    _, seconds = measure(lambda: summarize(report))
+    print(f"{'summarize':22} {seconds:8.2f} s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ChangeCache(os.path.join(tmp, 'database.csv'))
+        # the newest year is imported after the first report
+        cases = [('cache, cold', db[~last]), ('cache, warm', db[~last]),
+                 ('cache, year imported', db)]
+        for name, frame in cases:
+            (_, compared), seconds = measure(lambda f=frame: cache.get(f))
+            print(f"{name:22} {seconds:8.2f} s  {compared} model years "
+                  f"compared")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Crawl the fixture catalog pages from local servers and check the models.
+
+Every manufacturer directory of bench/fixtures/catalog is served by its own
+HTTP server (a host per manufacturer), each response delayed by --latency
+milliseconds. The crawl is run with one worker and with --workers workers,
+the found models are compared with bench/fixtures/catalog/expected.csv.
+Every url of all-urls.csv must be a model page of the CATALOG_SPEC of its
+importer. The exit status is 1 if models differ or urls do not match.
+
+usage: python -m bench.bench_discovery [--workers <N>] [--latency <MS>]
+"""
+import csv
+import functools
+import os
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from http.server import (SimpleHTTPRequestHandler, ThreadingHTTPServer,)
+from urllib.parse import urlsplit
+
+from bikeimport import importer_class
+from bikeimport.discovery import (CatalogCrawler, CrawlLimits,)
+
+from .pages import fixture_path
+
+#: synthetic catalog pages, one directory per manufacturer
+CATALOG_DIR = fixture_path('catalog')
+#: url list of known model pages
+KNOWN_URLS = os.path.join(os.path.dirname(__file__), '..', 'all-urls.csv')
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    """Serve a directory after a delay, without logging."""
+
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def serve(directory, latency):
+    """Serve directory on a free local port, return the server."""
+    handler = type('Handler', (_Handler,), {'latency': latency})
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', 0), functools.partial(handler, directory=directory))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def read_catalogs(bases):
+    """Return the start pages of catalogs.csv on the local servers."""
+    with open(os.path.join(CATALOG_DIR, 'catalogs.csv'), newline='',
+              encoding='utf-8') as f:
+        return [{**row, 'year': int(row['year']), 'url': bases[row['mfg']] +
+                 row['url'], 'spec': importer_class(row['mfg']).CATALOG_SPEC}
+                for row in csv.DictReader(f)]
+
+
+def read_expected():
+    """Return the expected rows, urls are paths on the local servers."""
+    with open(os.path.join(CATALOG_DIR, 'expected.csv'), newline='',
+              encoding='utf-8') as f:
+        return [{**row, 'year': int(row['year'])} for row in csv.DictReader(f)]
+
+
+def unmatched_urls(path=KNOWN_URLS):
+    """Return rows of the url list that are no model page of their spec.
+
+    Manufacturers without CATALOG_SPEC are left out.
+    """
+    unmatched = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            spec = importer_class(row['mfg']).CATALOG_SPEC
+            if spec is not None and spec.model(row['url']) is None:
+                unmatched.append(row)
+    return unmatched
+
+
+def crawl(catalogs, workers, per_host):
+    """Return (rows with url paths, crawler, seconds) of a crawl."""
+    crawler = CatalogCrawler(
+        CrawlLimits(workers=workers, per_host=per_host, delay=0))
+    start = time.perf_counter()
+    rows = crawler.crawl(catalogs)
+    seconds = time.perf_counter() - start
+    for row in rows:
+        parts = urlsplit(row['url'])
+        row['url'] = parts.path + (f'?{parts.query}' if parts.query else '')
+    return rows, crawler, seconds
+
+
+def check_crawl(catalogs, expected, workers, per_host):
+    """Crawl, print the rate and the differences, return True if the found
+    models are the expected ones."""
+    rows, crawler, seconds = crawl(catalogs, workers, per_host)
+    print(f"{workers:3} workers {seconds:8.2f} s  "
+          f"{crawler.fetched / seconds:7.1f} pages/s  "
+          f"{crawler.fetched} pages, {len(rows)} models")
+    for url, error in crawler.failed:
+        print(f"    failed {url}: {error}")
+    if rows == expected:
+        return True
+    found = {tuple(row.values()) for row in rows}
+    wanted = {tuple(row.values()) for row in expected}
+    for row in sorted(found - wanted):
+        print(f"    unexpected {row}")
+    for row in sorted(wanted - found):
+        print(f"    missing {row}")
+    return False
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", dest="workers", type=int, default=8)
+    parser.add_argument("--per-host", dest="per_host", type=int, default=2)
+    parser.add_argument("--latency", dest="latency", type=float, default=50,
+                        help="milliseconds per response")
+    a = parser.parse_args()
+
+    servers = {mfg: serve(os.path.join(CATALOG_DIR, mfg), a.latency / 1000)
+               for mfg in sorted(os.listdir(CATALOG_DIR))
+               if os.path.isdir(os.path.join(CATALOG_DIR, mfg))}
+    bases = {mfg: f'http://127.0.0.1:{server.server_address[1]}'
+             for mfg, server in servers.items()}
+    catalogs = read_catalogs(bases)
+    expected = read_expected()
+
+    unmatched = unmatched_urls()
+    for row in unmatched:
+        print(f"no model page of {row['mfg']}: {row['url']}")
+    ok = not unmatched
+    try:
+        for workers in sorted({1, a.workers}):
+            ok = check_crawl(catalogs, expected, workers, a.per_host) and ok
+    finally:
+        for server in servers.values():
+            server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
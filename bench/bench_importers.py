@@ -0,0 +1,176 @@
+"""Time every importer stage on the fixture pages and flag regressions.
+
+The fixture pages are synthetic (see bench.pages), the stored baselines
+detect slower code, they do not show how fast real pages are scraped.
+
+Stages per importer:
+  fetch       - read the page through the fixture session
+  parse       - build the document and find the geometry table
+  table       - parse_table(), geometry table element to raw frame
+  standardize - standardize_data() without make_std_cols_numeric()
+  numeric     - make_std_cols_numeric()
+  meta        - append_meta_info()
+
+The best of --repeat times is compared with the stored baseline, a stage is a regression
+if it is more than --threshold slower and more than --min-ms milliseconds.
+
+usage: python -m bench.bench_importers [-n <repeat>] [--parser <backend>]
+                                       [--baseline <FILE>] [--save]
+"""
+import json
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+from bikeimport import instantiate_importer
+from bikeimport.tablespec import PARSERS
+
+from .pages import (FixtureSession, fixture_pages,)
+
+#: Stages in pipeline order
+STAGES = ['fetch', 'parse', 'table', 'standardize', 'numeric', 'meta']
+
+#: Default baseline file
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+#: Files of importers that do not read HTML pages
+FILE_FIXTURES = {
+    'ridley': os.path.normpath(os.path.join(
+        os.path.dirname(__file__), '..', 'csv', 'ridley_fenix_slic.csv')),
+}
+
+
+def fixtures():
+    """Return {mfg: page} of all fixture pages and files."""
+    pages = fixture_pages()
+    pages.update(FILE_FIXTURES)
+    return dict(sorted(pages.items()))
+
+
+def time_stages(importer, page):
+    """Run all stages once, return {stage: seconds}."""
+    times = {}
+    numeric = importer.make_std_cols_numeric
+
+    def timed_numeric(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return numeric(*args, **kwargs)
+        finally:
+            times['numeric'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    content = importer.fetch(page)
+    times['fetch'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table = importer.extract_table(content, page)
+    times['parse'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = importer.parse_table(table)
+    times['table'] = time.perf_counter() - start
+
+    # time make_std_cols_numeric separately from the rest of standardize
+    importer.make_std_cols_numeric = timed_numeric
+    try:
+        start = time.perf_counter()
+        df = importer.standardize_data(df)
+        times['standardize'] = (time.perf_counter() - start
+                                - times.get('numeric', 0.0))
+    finally:
+        del importer.make_std_cols_numeric
+    times.setdefault('numeric', 0.0)
+
+    start = time.perf_counter()
+    importer.append_meta_info(df, 'bench', 2023, 'race')
+    times['meta'] = time.perf_counter() - start
+    return times
+
+
+def run(pages, repeat=20, parser=None):
+    """Return {mfg: {stage: best ms}} over repeat runs per page."""
+    session = FixtureSession(pages)
+    result = {}
+    for mfg, page in pages.items():
+        importer = instantiate_importer(mfg, parser=parser, session=session)
+        time_stages(importer, page)  # warm up
+        runs = [time_stages(importer, page) for _ in range(repeat)]
+        result[mfg] = {stage: round(min(r[stage] for r in runs) * 1e3, 4)
+                       for stage in STAGES}
+    return result
+
+
+def regressions(current, baseline, threshold=0.5, min_ms=0.2):
+    """Return [(mfg, stage, baseline ms, current ms)] of slower stages."""
+    slower = []
+    for mfg, stages in current.items():
+        for stage, ms in stages.items():
+            base = baseline.get(mfg, {}).get(stage)
+            if base is None:
+                continue
+            if ms > base * (1 + threshold) and ms - base > min_ms:
+                slower.append((mfg, stage, base, ms))
+    return slower
+
+
+def load_baseline(path, parser):
+    """Return stored times for parser or {} if there are none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get(parser, {})
+
+
+def save_baseline(path, parser, times):
+    """Store times for parser in the baseline file."""
+    stored = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            stored = json.load(f)
+    stored[parser] = times
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(stored, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("-n", dest="repeat", type=int, default=20)
+    parser.add_argument("--parser", dest="parser", default='lxml',
+                        choices=PARSERS)
+    parser.add_argument("--baseline", dest="baseline", default=BASELINE,
+                        metavar="<FILE>")
+    parser.add_argument("--save", dest="save", action="store_true",
+                        help="store the results as new baseline")
+    parser.add_argument("--threshold", dest="threshold", type=float,
+                        default=0.5, help="accepted slowdown (0.5 = 50%%)")
+    parser.add_argument("--min-ms", dest="min_ms", type=float, default=0.2,
+                        help="ignore slowdowns below this many ms")
+    a = parser.parse_args()
+
+    current = run(fixtures(), a.repeat, a.parser)
+    baseline = load_baseline(a.baseline, a.parser)
+
+    print(f"{'mfg':10}" + ''.join(f"{s:>12}" for s in STAGES) + "  (best ms)")
+    for mfg, stages in current.items():
+        print(f"{mfg:10}" + ''.join(f"{stages[s]:12.3f}" for s in STAGES))
+
+    if a.save:
+        save_baseline(a.baseline, a.parser, current)
+        print(f"Saved baseline for {a.parser} to {a.baseline}")
+        return
+    if not baseline:
+        print(f"No baseline for {a.parser} in {a.baseline}, use --save")
+        return
+    slower = regressions(current, baseline, a.threshold, a.min_ms)
+    for mfg, stage, base, ms in slower:
+        print(f"REGRESSION {mfg} {stage}: {base:.3f} ms -> {ms:.3f} ms")
+    if slower:
+        sys.exit(1)
+    print("No regressions on the fixture pages")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Compare loading the database as plain and as typed (compact) frame.
+
+usage: python -m bench.bench_load [--rows <N>] [--keep <FILE>]
+"""
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import pandas as pd
+from bikeimport.storage import SegmentStore
+
+from .synthetic import synthetic_database
+
+
+def measure(func):
+    """Return (result, seconds) of func()."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def footprint(df):
+    """Return the memory of df including the index in MiB."""
+    return df.memory_usage(deep=True, index=True).sum() / 2**20
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", dest="rows", type=int, default=1_000_000)
+    parser.add_argument("--keep", dest="keep", metavar="<FILE>",
+                        help="write the synthetic database to <FILE> and keep it")
+    a = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = a.keep or os.path.join(tmp, 'database.csv')
+        if not os.path.exists(path):
+            SegmentStore(path).append(synthetic_database(a.rows))
+        print(f"{os.path.getsize(path) / 2**20:.1f} MiB csv")
+
+        cases = {
+            'read_csv': lambda: pd.read_csv(path, index_col=[0, 1, 2, 3]),
+            'read(typed=True)': lambda: SegmentStore(path).read(typed=True),
+        }
+        print(f"{'loader':18} {'rows':>9} {'seconds':>8} {'MiB':>8}")
+        for name, func in cases.items():
+            df, seconds = measure(func)
+            print(f"{name:18} {len(df.index):9} {seconds:8.2f} "
+                  f"{footprint(df):8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark make_std_cols_numeric on a synthetic geometry table.
+
+usage: python -m bench.bench_numeric [--rows <N>] [--no-legacy]
+"""
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+import pandas as pd
+from bikeimport import instantiate_importer
+
+
+def synthetic_table(importer, rows, seed=0):
+    """Return rows x std_cols table of strings as scraped from websites."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col in importer.std_cols():
+        if col.endswith('angle'):
+            values = rng.uniform(70, 75, rows).round(1).astype(str)
+            # decimal comma and degree sign as on german websites
+            data[col] = np.char.add(np.char.replace(values, '.', ','), '°')
+        else:
+            data[col] = rng.integers(40, 1100, rows).astype(str)
+    df = pd.DataFrame(data)
+    df.index = pd.Index(rng.choice(['XS', 'S', 'M', 'L', 'XL'], rows),
+                        name=importer.MFG_FRAME_KEY)
+    return df
+
+
+def legacy_std_cols_numeric(importer, df):
+    """Conversion as implemented before the vectorized engine."""
+    df = df.applymap(
+        lambda x: str(x.replace(',', '.')) if isinstance(x, str) else x)
+    df = df.applymap(
+        lambda x: str(x.replace('°', '')) if isinstance(x, str) else x)
+    df.loc[:, importer.std_cols()] = df[importer.std_cols()].apply(pd.to_numeric)
+    return df
+
+
+def timed(func, *args):
+    """Return (result, seconds) of func(*args)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", dest="rows", type=int, default=1_000_000)
+    parser.add_argument("--no-legacy", dest="legacy", action="store_false")
+    a = parser.parse_args()
+
+    importer = instantiate_importer('giant')
+    df = synthetic_table(importer, a.rows)
+    print(f"{a.rows} rows x {len(df.columns)} columns")
+
+    new, t_new = timed(importer.make_std_cols_numeric, df)
+    print(f"vectorized  {t_new:8.2f} s")
+    if a.legacy:
+        old, t_old = timed(legacy_std_cols_numeric, importer, df)
+        print(f"applymap    {t_old:8.2f} s  ({t_old / t_new:.1f}x)")
+        np.testing.assert_allclose(old.to_numpy(dtype=float),
+                                   new.to_numpy(dtype=float))
+
+
+if __name__ == '__main__':
+    main()
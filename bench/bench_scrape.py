@@ -0,0 +1,96 @@
+"""Time the raw table build of scrape() per fixture page.
+
+The importers used to grow the raw table by one pd.concat() per table row,
+which copies the frame for every row. ExtractionPlan.frame() collects the
+cells and builds the frame once. Both are timed on the geometry table of
+every fixture page, starting from the parsed table element, and have to
+return the same frame. The exit status is 1 if they differ.
+
+usage: python -m bench.bench_scrape [-n <repeat>] [--parser <backend>]
+"""
+import statistics
+import sys
+import time
+from argparse import ArgumentParser
+
+import pandas as pd
+from lxml import etree
+
+from bikeimport import instantiate_importer
+from bikeimport.dataimporter import DataImporter
+from bikeimport.tablespec import PARSERS
+
+from .pages import (FixtureSession, fixture_pages,)
+
+_STRING = etree.XPath('string()')
+
+
+def _text(node):
+    return (node if isinstance(node, str) else _STRING(node)).strip()
+
+
+def concat_frame(plan, table):
+    """Return the raw frame of table built row by row with pd.concat().
+
+    The cells are those of plan.frame(), the frame is grown like the
+    importers did before: a header row with the sizes, then one concat()
+    per table row, transposed at the end.
+    """
+    sizes = [_text(cell) for cell in plan.sizes(table)]
+    df = pd.DataFrame(data=[DataImporter.MFG_FRAME_KEY] + sizes).T
+    for row in plan.rows(table):
+        label = next((_text(found[0]) for found in
+                      (expr(row) for expr in plan.label)
+                      if found and _text(found[0])), None)
+        if label:
+            cells = [_text(cell) for cell in plan.values(row)][:len(sizes)]
+            df = pd.concat([df, pd.DataFrame([label.lower()] + cells).T])
+    df = df.T
+    df.columns = df.iloc[0]
+    df = df.drop(0).set_index(DataImporter.MFG_FRAME_KEY)
+    df.columns.name = None
+    return df
+
+
+def median_ms(func, table, repeat):
+    """Return the median wall time of func(table) in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(table)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("-n", dest="repeat", type=int, default=50)
+    parser.add_argument("--parser", dest="parser", default='lxml',
+                        choices=PARSERS)
+    a = parser.parse_args()
+
+    pages = fixture_pages()
+    session = FixtureSession(pages)
+    ok = True
+    print(f"{'mfg':10} {'rows':>5} {'concat ms':>10} {'frame ms':>10} "
+          f"{'speedup':>8}")
+    for mfg, page in pages.items():
+        importer = instantiate_importer(mfg, parser=a.parser, session=session)
+        plan = importer.TABLE_SPEC.plan()
+        table = importer.extract_table(importer.fetch(page), page)
+        # the first call removes excluded elements from the table
+        expected = plan.frame(table)
+        before = median_ms(lambda t, p=plan: concat_frame(p, t), table,
+                           a.repeat)
+        after = median_ms(plan.frame, table, a.repeat)
+        same = concat_frame(plan, table).astype(object).fillna('').equals(
+            expected.astype(object).fillna(''))
+        ok = ok and same
+        print(f"{mfg:10} {len(expected.columns):5} {before:10.3f} "
+              f"{after:10.3f} {before / after:7.1f}x"
+              + ("" if same else "  FRAMES DIFFER"))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
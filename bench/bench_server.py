@@ -0,0 +1,66 @@
+"""Measure requests per second of a running comparison server.
+
+Every client keeps one connection open and sends its requests one after
+the other (keep-alive).
+
+usage: python -m bench.bench_server [--port <N>] [-c <clients>] [-n <requests>]
+                                    <path> [<path> ...]
+"""
+import asyncio
+import time
+from argparse import ArgumentParser
+
+
+async def client(host, port, paths, count, latencies):
+    """Send count requests cycling through paths over one connection."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(count):
+            path = paths[i % len(paths)]
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n"
+                         .encode('latin-1'))
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(host, port, paths, clients, requests):
+    """Return (seconds, latencies) of requests spread over clients."""
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, paths, requests // clients,
+                                  latencies) for _ in range(clients)])
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--host", dest="host", default="127.0.0.1")
+    parser.add_argument("--port", dest="port", type=int, default=8000)
+    parser.add_argument("-c", dest="clients", type=int, default=16)
+    parser.add_argument("-n", dest="requests", type=int, default=20000)
+    parser.add_argument("paths", nargs="+",
+                        help="request paths, e.g. '/lookup?mfg=giant&model=tcr'")
+    a = parser.parse_args()
+
+    seconds, latencies = asyncio.run(
+        run(a.host, a.port, a.paths, a.clients, a.requests))
+    n = len(latencies)
+    print(f"{n} requests in {seconds:.2f}s: {n / seconds:.0f} requests/s, "
+          f"p50 {latencies[n // 2] * 1e3:.2f} ms, "
+          f"p99 {latencies[int(n * 0.99)] * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Time similarity queries on a synthetic database.
+
+usage: python -m bench.bench_similarity [--rows <N>] [-n <queries>]
+"""
+import statistics
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+from bikeimport.similarity import GeometryIndex
+
+from .synthetic import synthetic_database
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", dest="rows", type=int, default=100_000)
+    parser.add_argument("-n", dest="queries", type=int, default=100)
+    a = parser.parse_args()
+
+    db = synthetic_database(a.rows)
+    start = time.perf_counter()
+    index = GeometryIndex(db)
+    print(f"{len(index)} frames, index built in "
+          f"{(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    rng = np.random.default_rng(1)
+    times = []
+    for row in rng.integers(0, len(db.index), a.queries):
+        start = time.perf_counter()
+        index.similar(*db.index[row], k=10)
+        times.append(time.perf_counter() - start)
+    print(f"top-10 query: median {statistics.median(times) * 1e3:.2f} ms, "
+          f"max {max(times) * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
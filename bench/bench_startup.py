@@ -0,0 +1,70 @@
+"""Measure cold-start time and heavy imports of the command line tools.
+
+Every case runs in a fresh interpreter, the best of -n runs is reported
+together with the heavy modules it loaded.
+
+usage: python -m bench.bench_startup [-n <repeat>]
+"""
+import os
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+#: Repository root, the working directory of the cases
+ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))
+
+#: Modules whose import dominates start-up time
+HEAVY_MODULES = ['pandas', 'numpy', 'bs4', 'requests', 'html5lib', 'lxml']
+
+#: name -> python code run in a fresh interpreter
+CASES = {
+    'python': 'pass',
+    'import bikeimport': 'import bikeimport',
+    'importer names': 'import bikeimport; bikeimport.available_importer_names()',
+    'import_bikes --help': (
+        'import sys; sys.argv = ["import_bikes.py", "--help"]\n'
+        'import runpy; runpy.run_path("import_bikes.py", run_name="__main__")'),
+    'scrape --help': (
+        'import sys; sys.argv = ["scrape.py", "--help"]\n'
+        'import runpy; runpy.run_path("scrape.py", run_name="__main__")'),
+    'ridley importer': (
+        'import bikeimport; bikeimport.instantiate_importer("ridley")'),
+    'giant importer': (
+        'import bikeimport; bikeimport.instantiate_importer("giant")'),
+}
+
+#: prints the loaded heavy modules when the case exits
+_REPORT = ('\nimport atexit, sys\n'
+           'atexit.register(lambda: sys.stderr.write(" ".join(m for m in {0!r}'
+           ' if m in sys.modules)))\n')
+
+
+def run_case(code, repeat=5):
+    """Return (best seconds, loaded heavy modules) of code."""
+    times = []
+    loaded = ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        p = subprocess.run([sys.executable, '-c',
+                            _REPORT.format(HEAVY_MODULES) + code],
+                           cwd=ROOT, capture_output=True, text=True,
+                           check=False)
+        times.append(time.perf_counter() - start)
+        loaded = p.stderr.strip().splitlines()[-1] if p.stderr.strip() else ''
+    return min(times), loaded
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("-n", dest="repeat", type=int, default=5)
+    a = parser.parse_args()
+
+    print(f"{'case':22} {'best ms':>8}  heavy modules")
+    for name, code in CASES.items():
+        seconds, loaded = run_case(code, a.repeat)
+        print(f"{name:22} {seconds*1e3:8.1f}  {loaded or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Serve the fixture pages of bench/fixtures instead of the network.
+
+The fixture pages are synthetic, not saved manufacturer pages: the
+geometry table markup of each importer between filler scripts and product
+lists. Results on them show regressions of the code, not the performance
+on real pages.
+"""
+import os
+
+#: directory with fixture pages, one <mfg>.html per HTML importer
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def fixture_path(name):
+    """Return the path of the fixture page or file name."""
+    return os.path.join(FIXTURE_DIR, name)
+
+
+def fixture_pages():
+    """Return {mfg: path} of all fixture HTML pages."""
+    pages = {}
+    for name in sorted(os.listdir(FIXTURE_DIR)):
+        mfg, ext = os.path.splitext(name)
+        if ext == '.html':
+            pages[mfg] = fixture_path(name)
+    return pages
+
+
+class FixtureResponse:
+    """Minimal requests.Response stand-in."""
+
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {}
+
+    def iter_content(self, chunk_size=1):
+        """Yield the content in chunks like a streamed response."""
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        """Nothing to release."""
+
+
+class FixtureSession:
+    """requests compatible session answering from fixture pages.
+
+    URLs are file paths or names of fixture pages, e.g. 'giant' or
+    'bench/fixtures/giant.html'.
+    """
+
+    def __init__(self, pages=None):
+        self.pages = pages if pages is not None else fixture_pages()
+        self._content = {}
+
+    def load(self, url):
+        """Return content of the fixture page, read once from disk."""
+        if url not in self._content:
+            with open(self.pages.get(url, url), 'rb') as f:
+                self._content[url] = f.read()
+        return self._content[url]
+
+    def get(self, url, headers=None, timeout=None, stream=False):  # pylint: disable=unused-argument
+        """Return the fixture page for url."""
+        return FixtureResponse(self.load(url))
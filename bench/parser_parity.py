@@ -0,0 +1,66 @@
+"""Check that all parser backends give the expected data.
+
+Every fixture page is scraped and standardized with every parser backend
+and compared with the expected frame in bench/fixtures/expected/<mfg>.csv.
+The expected frames were recorded with the former BeautifulSoup
+implementations of the importers. The fixture pages are synthetic, pass
+saved manufacturer pages as <mfg>=<page.html> to check real markup.
+
+usage: python -m bench.parser_parity [<mfg>=<page.html> ...]
+"""
+import os
+import sys
+
+import pandas as pd
+from bikeimport import instantiate_importer
+from bikeimport.dataimporter import DataImporter
+from bikeimport.tablespec import PARSERS
+
+from .pages import (FixtureSession, fixture_pages, fixture_path,)
+
+
+def scrape_page(mfg, page, parser, session):
+    """Scrape and standardize a fixture page with the given parser."""
+    importer = instantiate_importer(mfg, parser=parser, session=session)
+    df = importer.scrape(page)
+    return importer.standardize_data(df)
+
+
+def expected_frame(mfg):
+    """Return the expected standardized frame of mfg, None if missing."""
+    path = fixture_path(os.path.join('expected', f'{mfg}.csv'))
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype={DataImporter.MFG_FRAME_KEY: str})
+
+
+def check_parity(pages):
+    """Compare every parser with the expected frames, return mismatches."""
+    session = FixtureSession(pages)
+    mismatches = []
+    for mfg, page in pages.items():
+        expected = expected_frame(mfg)
+        if expected is None:
+            print(f"{mfg:10} no expected frame, skipped")
+            continue
+        for parser in PARSERS:
+            try:
+                df = scrape_page(mfg, page, parser, session)
+                pd.testing.assert_frame_equal(expected, df)
+                print(f"{mfg:10} {parser:12} ok")
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"{mfg:10} {parser:12} MISMATCH {e}")
+                mismatches.append((mfg, parser))
+    return mismatches
+
+
+def main():
+    pages = fixture_pages()
+    if sys.argv[1:]:
+        pages = dict(arg.split('=', 1) for arg in sys.argv[1:])
+    if check_parity(pages):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Check that concurrent scrape.py runs give the result of a sequential run.
+
+Every fixture page is served by its own local HTTP server (a host per
+manufacturer). scrape.py is run sequentially and with combinations of
+--workers and --processes, every run has to finish within --timeout seconds
+and write the same database as the sequential run. The exit status is 1 if
+a run hangs, fails or differs.
+
+usage: python -m bench.scrape_parity [--timeout <S>]
+"""
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+
+from .bench_discovery import serve
+from .pages import (FIXTURE_DIR, fixture_pages,)
+
+#: scrape.py of this repository
+SCRAPE = os.path.join(os.path.dirname(__file__), '..', 'scrape.py')
+
+#: Options of the checked runs, the first one is the reference
+RUNS = [
+    [],
+    ['--workers', '2'],
+    ['--processes', '2'],
+    ['--workers', '2', '--processes', '2'],
+    ['--workers', '4', '--processes', '2'],
+]
+
+
+def write_source(path, bases):
+    """Write a source file with two model years of every fixture page."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('mfg,model,year,category,url\n')
+        for year in (2023, 2024):
+            for mfg, base in bases.items():
+                f.write(f'{mfg},bench,{year},race,{base}/{mfg}.html\n')
+
+
+def scrape(source, database, options, timeout):
+    """Run scrape.py, return (error message or None, database content)."""
+    cmd = [sys.executable, SCRAPE, '-s', source, '-d', database,
+           '--delay', '0'] + options
+    # own process group, a hanging run is killed with its worker processes
+    with subprocess.Popen(cmd, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE,
+                          start_new_session=True) as proc:
+        try:
+            _, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.communicate()
+            return f"no result after {timeout} s", None
+    if proc.returncode:
+        return stderr.decode('utf-8', 'replace').strip().splitlines()[-1], None
+    with open(database, 'rb') as f:
+        return None, f.read()
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--timeout", dest="timeout", type=float, default=120,
+                        help="seconds a run may take")
+    a = parser.parse_args()
+
+    servers = {mfg: serve(FIXTURE_DIR, 0) for mfg in fixture_pages()}
+    bases = {mfg: f'http://127.0.0.1:{server.server_address[1]}'
+             for mfg, server in servers.items()}
+    ok = True
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'urls.csv')
+            write_source(source, bases)
+            expected = None
+            for i, options in enumerate(RUNS):
+                name = ' '.join(options) or 'sequential'
+                error, content = scrape(
+                    source, os.path.join(tmp, f'db{i}.csv'), options,
+                    a.timeout)
+                if expected is None:
+                    expected = content
+                if error or content != expected:
+                    ok = False
+                    print(f"{name:30} FAILED {error or 'database differs'}")
+                else:
+                    print(f"{name:30} ok")
+    finally:
+        for server in servers.values():
+            server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
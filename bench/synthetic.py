@@ -0,0 +1,58 @@
+"""Synthetic standardized geometry databases for benchmarks."""
+import numpy as np
+import pandas as pd
+
+from bikeimport.dataimporter import DataImporter
+from bikeimport.globals import get_bike_categories
+
+MFGS = ['stevens', 'giant', 'cube', 'rose', 'bmc', 'ridley']
+SIZES = ['XS', 'S', 'M', 'L', 'XL', 'XXL']
+#: manufacturers not publishing a fork rake
+NO_FORK_RAKE = ['cube', 'ridley']
+
+
+def synthetic_database(rows, seed=0, years=(2019, 2024)):
+    """Return a standardized database with about rows rows.
+
+    Models have one row per frame size, dimensions grow with the size like
+    real geometry tables.
+    """
+    rng = np.random.default_rng(seed)
+    models = max(1, rows // len(SIZES))
+    n = models * len(SIZES)
+    size = np.tile(np.arange(len(SIZES)), models)
+
+    mfg = np.repeat(rng.choice(MFGS, models), len(SIZES))
+    data = {
+        DataImporter.MFG_KEY: mfg,
+        DataImporter.MODEL_KEY: np.repeat(
+            [f"model-{i}" for i in range(models)], len(SIZES)),
+        DataImporter.YEAR_KEY: np.repeat(
+            rng.integers(years[0], years[1] + 1, models), len(SIZES)),
+        DataImporter.MFG_FRAME_KEY: np.array(SIZES)[size],
+        DataImporter.CAT_KEY: np.repeat(
+            rng.choice(get_bike_categories(), models), len(SIZES)),
+    }
+
+    def dim(base, step, noise):
+        return (base + step * size + rng.normal(0, noise, n)).round(1)
+
+    data['stack'] = dim(510, 20, 8)
+    data['reach'] = dim(365, 8, 4)
+    data['head_tube_angle'] = np.minimum(dim(70.5, 0.6, 0.3), 74).round(2)
+    data['seat_tube_angle'] = np.maximum(dim(74.5, -0.3, 0.3), 71.5).round(2)
+    data['chain_stay'] = dim(410, 0, 5)
+    data['wheel_base'] = dim(970, 12, 6)
+    data['bb_drop'] = dim(70, 0, 2)
+    data['seat_tube'] = dim(470, 30, 10)
+    data['top_tube'] = dim(515, 15, 6)
+    data['stand_over_height'] = dim(730, 28, 8)
+    fork_rake = dim(50, -1, 2)
+    fork_rake[np.isin(mfg, NO_FORK_RAKE)] = np.nan
+    data['fork_rake'] = fork_rake
+
+    df = pd.DataFrame(data)
+    return df.set_index([DataImporter.MFG_KEY,
+                         DataImporter.MODEL_KEY,
+                         DataImporter.YEAR_KEY,
+                         DataImporter.MFG_FRAME_KEY])
@@ -1,25 +1,89 @@
 """
 Data importer selection and instantiation infrastructure.
 
-Module collects all manufacturer specific classes
+Importers are registered by manufacturer name and imported on first use, so
+importing the package does not load pandas, bs4 or requests. Third-party
+importers are found through the entry point group ENTRY_POINT_GROUP, e.g. in
+setup.cfg:
+
+    [options.entry_points]
+    bikeimport.importers =
+        canyon = mypackage.canyon:CanyonImporter
 """
+from importlib import import_module
+from importlib.metadata import entry_points
 
 from .globals import normalize
 
-from .stevens import StevensImporter
-from .giant import GiantImporter
-from .cube import CubeImporter
-from .rose import RoseImporter
-from .bmc import BmcImporter
-from .ridley import RidleyImporter
+#: Entry point group of third-party importers
+ENTRY_POINT_GROUP = 'bikeimport.importers'
+
+#: Built-in importers, normalized manufacturer name -> 'module:Class'
+IMPORTERS = {
+    'stevens': 'bikeimport.stevens:StevensImporter',
+    'giant': 'bikeimport.giant:GiantImporter',
+    'cube': 'bikeimport.cube:CubeImporter',
+    'rose': 'bikeimport.rose:RoseImporter',
+    'bmc': 'bikeimport.bmc:BmcImporter',
+    'ridley': 'bikeimport.ridley:RidleyImporter',
+}
+
+_registry = None
+_classes = {}
+
+
+def _importers():
+    """Return the registry, entry points are discovered on first use."""
+    global _registry  # pylint: disable=global-statement
+    if _registry is None:
+        registry = {}
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            registry[normalize(ep.name)] = ep.value
+        # built-in importers can not be replaced by plugins
+        registry.update(IMPORTERS)
+        _registry = registry
+    return _registry
+
 
-importers = []
-importers.append(StevensImporter)
-importers.append(GiantImporter)
-importers.append(CubeImporter)
-importers.append(RoseImporter)
-importers.append(BmcImporter)
-importers.append(RidleyImporter)
+def register_importer(mfg, target):
+    """
+    Register an importer for a manufacturer.
+
+    Parameters:
+    -----------
+    mfg (str) : manufacturer will be normalized
+    target (str or type) : 'module:Class' or the importer class
+    """
+    mfg = normalize(mfg)
+    _classes.pop(mfg, None)
+    if isinstance(target, str):
+        _importers()[mfg] = target
+    else:
+        _importers()[mfg] = f"{target.__module__}:{target.__qualname__}"
+        _classes[mfg] = target
+
+
+def importer_class(mfg):
+    """
+    Return the importer class for a manufacturer, import it if needed.
+
+    Parameters:
+    -----------
+    mfg (str) : manufacturer will be normalized
+    """
+    _mfg = normalize(mfg)
+    try:
+        return _classes[_mfg]
+    except KeyError:
+        pass
+    try:
+        target = _importers()[_mfg]
+    except KeyError:
+        raise KeyError(f"No importer for manufacturer: {_mfg} found") from None
+    module, _, name = target.partition(':')
+    cls = getattr(import_module(module), name)
+    _classes[_mfg] = cls
+    return cls
 
 
 def is_compatible(mfg, importer):
@@ -35,10 +99,7 @@ def is_compatible(mfg, importer):
 
 def available_importer_names():
     """Return manufacturer names for available importers"""
-    mfg_names = []
-    for imp in importers:
-        mfg_names.append(imp.MFG_NAME)
-    return mfg_names
+    return list(_importers())
 
 def instantiate_importer(mfg, *args, **kwargs):
     """
@@ -50,9 +111,11 @@ def instantiate_importer(mfg, *args, **kwargs):
     -----------
     mfg (str) : manufacturer will be normalized
     """
+    return importer_class(mfg)(**kwargs)
 
-    _mfg = normalize(mfg)
-    for imp in importers:
-        if is_compatible(_mfg, imp):
-            return imp(**kwargs)
-    raise KeyError(f"No importer for manufacturer: {_mfg} found")
+
+def __getattr__(name):
+    # the former list of all importer classes, loads every importer
+    if name == 'importers':
+        return [importer_class(mfg) for mfg in _importers()]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,34 @@
+"""Replace files atomically, readers never see partial files."""
+import os
+import uuid
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_path(path):
+    """Yield a temporary path next to path, moved over path on success.
+
+    The caller creates the temporary file, e.g. open(tmp, 'x'). It gets the
+    permissions of the umask like any new file, not the 0600 of mkstemp(),
+    so databases, caches and metrics stay readable by other users. The
+    temporary file is removed if the block raises.
+    """
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_atomic(path, data):
+    """Replace path with data (str or bytes)."""
+    with atomic_path(path) as tmp:
+        if isinstance(data, bytes):
+            with open(tmp, 'xb') as f:
+                f.write(data)
+        else:
+            with open(tmp, 'x', encoding='utf-8') as f:
+                f.write(data)
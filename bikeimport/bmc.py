@@ -1,9 +1,9 @@
 """Scrape and reformat bike geometry data of bmc bikes."""
-import pandas as pd
-from .dataimporter import DataImporter
+from .discovery import CatalogSpec
+from .tablespec import (SpecImporter, TableSpec, has_class,)
 
 
-class BmcImporter(DataImporter):
+class BmcImporter(SpecImporter):
     """Website scraper and geometry table parser for BMC bikes (2023).
 
     https://www.bmc-switzerland.com
@@ -11,6 +11,19 @@ class BmcImporter(DataImporter):
 
     #: Compatible Manufacturer names for this importer, fixed
     MFG_NAME = 'bmc'
+    #: Labels are descriptions with units, e.g. 'Stack mm'
+    TABLE_SPEC = TableSpec(
+        table=('table', {'class': 'geometry'}),
+        sizes=f'.//thead//th[{has_class("geometry__cell--value")}]',
+        rows=f'.//tbody/tr[{has_class("geometry__row")}]',
+        label=f'td[{has_class("geometry__cell--label")}]',
+        values=f'td[{has_class("geometry__cell--value")}]')
+    #: Model pages are /intl_en/bmc-<model>-<year>.html or
+    #: /intl_en/<year>-<model>-<category>-bikes.html
+    CATALOG_SPEC = CatalogSpec((
+        r'/intl_en/bmc-(?P<model>[^/]+?)-\d\d\.html$',
+        r'/intl_en/\d\d-(?P<model>[^/]+?)-(?:endurance-)?'
+        r'(?:road|gravel|cyclocross|mountain)-bikes\.html$'))
 
     def __init__(self, *args, **kwargs):
         """Create an importer for bmc-bikes."""
@@ -29,48 +42,3 @@ class BmcImporter(DataImporter):
             "stack mm": self.std_column_map["Stack"],
             "fork rake mm (fr)": self.std_column_map['ForkRake']
         }
-
-    def standardize_data(self, df):
-        """Map raw data to well-known properties."""
-        # Column 1 should contain MFG_FRAME_KEY='MfgDimNames'
-        df = df.T  # Transpose to make properties columns and sizes the index
-        # Line 0 is the column header, BMC is not consistent with case...
-        df.iloc[0]=df.iloc[0].apply(str.lower)
-        df.columns = df.iloc[0]
-        df = df.rename(columns=self.col_map)
-        df = df.drop([0])  # MfgDimNames
-        df.set_index(self.MFG_FRAME_KEY, inplace=True)
-        # discard all other columns
-        df = df[self.std_cols()]
-        # sometimes the csv/google spreadsheet exports empty cols/rows
-        df.dropna(how='all', inplace=True)
-
-        df = self.make_std_cols_numeric(df)
-        # Return dataframe without index
-        return df.reset_index()
-
-    def scrape(self, url):
-        """Retrieve and parse data from the website given by url."""
-
-        soup = self.get_soup(url)
-        geometry_table = soup.find('table', attrs={'class': 'geometry'})
-        col_head = [self.MFG_FRAME_KEY]
-
-        # Table Head with frame sizes
-        table_head  = geometry_table.find('thead')
-        for frame_size in table_head.findAll('th', attrs={'class':['geometry__cell--value']}):
-            col_head.append(frame_size.text.strip())
-
-        df = pd.DataFrame(data=col_head).T
-
-        # Table row entries properties
-        table_body = geometry_table.find('tbody')
-        for row in table_body.findAll('tr', attrs={'class': 'geometry__row'}):
-            prop = []
-            label = row.find('td',attrs={'class':['geometry__cell--label']})
-            prop.append(label.text.strip())
-            for td in row.findAll('td', attrs={'class': ['geometry__cell--value']}):
-                prop.append(td.text.strip())
-            df = pd.concat([df, pd.DataFrame(prop).T])
-
-        return df
@@ -0,0 +1,180 @@
+"""Persistent HTTP response cache with conditional revalidation."""
+import hashlib
+import json
+import os
+import time
+
+from .atomic import write_atomic
+from .globals import get_header
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache for product pages, keyed by URL.
+
+    Layout of cache_dir:
+      entries/<sha256(url)>.json  - url, ETag, Last-Modified, timestamps
+      objects/<sha256(body)>      - response body, shared by equal pages
+
+    Cached pages are revalidated with If-None-Match/If-Modified-Since,
+    an unchanged page costs a '304 Not Modified' without body. If the
+    server fails (5xx) the cached page is served stale. In offline mode no
+    request is sent at all.
+    """
+
+    def __init__(self, cache_dir, offline=False, fresh_for=0,
+                 max_age=None, max_size=None):
+        """Create or open a response cache.
+
+        Parameters:
+        -----------
+        cache_dir (str): directory of the cache, created if missing
+        offline (bool): never access the network, only serve cached pages
+        fresh_for (float): seconds a cached page is used without revalidation
+        max_age (float): evict entries not used for max_age seconds
+        max_size (int): evict least recently used entries beyond max_size bytes
+        """
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.fresh_for = fresh_for
+        self.max_age = max_age
+        self.max_size = max_size
+        self._entry_dir = os.path.join(cache_dir, 'entries')
+        self._object_dir = os.path.join(cache_dir, 'objects')
+        os.makedirs(self._entry_dir, exist_ok=True)
+        os.makedirs(self._object_dir, exist_ok=True)
+
+    @staticmethod
+    def _hash(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def _entry_path(self, url):
+        return os.path.join(self._entry_dir,
+                            self._hash(url.encode()) + '.json')
+
+    def _object_path(self, digest):
+        return os.path.join(self._object_dir, digest)
+
+    def lookup(self, url):
+        """Return (entry, body) for a cached url or None."""
+        try:
+            with open(self._entry_path(url), encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(self._object_path(entry['body']), 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry, body
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Store body for url together with its validators."""
+        digest = self._hash(body)
+        obj = self._object_path(digest)
+        if not os.path.exists(obj):
+            write_atomic(obj, body)
+        now = time.time()
+        entry = {
+            'url': url,
+            'body': digest,
+            'size': len(body),
+            'etag': etag,
+            'last_modified': last_modified,
+            'validated': now,
+            'used': now,
+        }
+        write_atomic(self._entry_path(url),
+                           json.dumps(entry).encode('utf-8'))
+
+    def _touch(self, url, entry, validated=False):
+        entry['used'] = time.time()
+        if validated:
+            entry['validated'] = entry['used']
+        write_atomic(self._entry_path(url),
+                           json.dumps(entry).encode('utf-8'))
+
+    def get(self, url, session, timeout=5):
+        """Return the body of url, from cache if it has not changed.
+
+        Parameters:
+        -----------
+        url (str): page to retrieve
+        session: object with a requests compatible get() method
+        timeout (float): request timeout in seconds
+
+        Returns:
+        --------
+        bytes: response body
+
+        Raises:
+        -------
+        requests.HTTPError on 4xx and 5xx responses, unless a cached page
+        is served stale on a 5xx
+        """
+        cached = self.lookup(url)
+        if cached:
+            entry, body = cached
+            if self.offline or time.time() - entry['validated'] < self.fresh_for:
+                self._touch(url, entry)
+                return body
+        elif self.offline:
+            raise KeyError(f"{url} is not cached, cannot fetch in offline mode")
+
+        headers = dict(get_header())
+        if cached:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        r = session.get(url, headers=headers, timeout=timeout)
+        if cached and r.status_code == 304:
+            self._touch(url, entry, validated=True)
+            return body
+        if cached and r.status_code >= 500:
+            # stale-if-error, the page is revalidated on the next run
+            self._touch(url, entry)
+            return body
+        # an error page is no page, do not hand it to the importer
+        r.raise_for_status()
+        if r.status_code == 200:
+            self.store(url, r.content,
+                       etag=r.headers.get('ETag'),
+                       last_modified=r.headers.get('Last-Modified'))
+        return r.content
+
+    def evict(self):
+        """Remove entries older than max_age and beyond max_size (LRU).
+
+        Returns:
+        --------
+        int: number of evicted entries
+        """
+        entries = []
+        for name in os.listdir(self._entry_dir):
+            path = os.path.join(self._entry_dir, name)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    entries.append((path, json.load(f)))
+            except (OSError, ValueError):
+                os.remove(path)
+
+        now = time.time()
+        entries.sort(key=lambda e: e[1]['used'], reverse=True)
+        keep = []
+        evicted = 0
+        total = 0
+        for path, entry in entries:
+            too_old = self.max_age is not None and now - entry['used'] > self.max_age
+            too_big = self.max_size is not None and total + entry['size'] > self.max_size
+            if too_old or too_big:
+                os.remove(path)
+                evicted += 1
+            else:
+                total += entry['size']
+                keep.append(entry['body'])
+
+        # bodies no longer referenced by any entry
+        referenced = set(keep)
+        for digest in os.listdir(self._object_dir):
+            if digest not in referenced:
+                os.remove(self._object_path(digest))
+        return evicted
@@ -0,0 +1,272 @@
+"""Year-over-year geometry changes of models in the database."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .dataimporter import DataImporter
+from .numeric import whole_numbers_as_int
+from .storage import (DATA_COLUMNS, key_hashes,)
+
+MFG = DataImporter.MFG_KEY
+MODEL = DataImporter.MODEL_KEY
+YEAR = DataImporter.YEAR_KEY
+SIZE = DataImporter.MFG_FRAME_KEY
+PREV_YEAR = 'prev_year'
+
+#: Dimensions compared between model years
+DIMENSIONS = DATA_COLUMNS[1:]
+
+#: Changes up to these are rounding of the published values, lengths in mm,
+#: angles (columns ending with _angle) in degrees
+LENGTH_TOLERANCE = 2.0
+ANGLE_TOLERANCE = 0.25
+
+#: A model year is a redesign if at least this share of the sizes of both
+#: years changed or no size is in both years
+REDESIGN_SHARE = 0.5
+
+#: Status of a size compared to the previous model year
+SAME, CHANGED, ADDED, REMOVED = 'same', 'changed', 'added', 'removed'
+
+#: Key of size rows in the change report
+CHANGE_KEYS = [MFG, MODEL, YEAR, SIZE]
+
+
+def tolerances(columns=None):
+    """Return the tolerance of every column (default DIMENSIONS) as numpy
+    array."""
+    return np.array([ANGLE_TOLERANCE if c.endswith('_angle')
+                     else LENGTH_TOLERANCE for c in columns or DIMENSIONS])
+
+
+def _keys(index):
+    """Return the keys of a database index as integer columns.
+
+    mfg, model and size are the codes of their index level, the year its
+    value.
+    """
+    names = list(index.names)
+    keys = pd.DataFrame({name: index.codes[names.index(name)].astype(np.int64)
+                         for name in CHANGE_KEYS})
+    years = index.levels[names.index(YEAR)].to_numpy().astype(np.int64)
+    keys[YEAR] = years[keys[YEAR].to_numpy()]
+    return keys
+
+
+def _row_hashes(db):
+    """Return a hash per row over its key and dimensions."""
+    # rounded, float32 and float64 reads of a database hash the same
+    values = db.reindex(columns=DIMENSIONS).to_numpy(dtype=np.float64).round(4)
+    hashes = pd.util.hash_array(values.ravel(), categorize=False).reshape(
+        values.shape)
+    combined = np.zeros(len(db.index), dtype=np.uint64)
+    for column in hashes.T:
+        combined = combined * np.uint64(1000003) ^ column
+    return combined * np.uint64(1000003) ^ key_hashes(db.index)
+
+
+def model_years(db):
+    """Return the model years of db with the previous year of the model.
+
+    Parameters:
+    -----------
+    db (pandas.DataFrame): database indexed by INDEX_KEYS
+
+    Returns:
+    --------
+    pandas.DataFrame with columns mfg and model (codes of the index levels),
+    year, prev_year (-1 for the first year of a model), hash over all rows
+    of the model year and pair, a hash over the rows of the model year and
+    of its previous year
+    """
+    rows = _keys(db.index)
+    groups = rows.groupby([MFG, MODEL, YEAR], sort=True)
+    ids = groups.ngroup().to_numpy()
+    # rows of a model year combine their hashes independent of the order
+    hashes = np.zeros(groups.ngroups, dtype=np.uint64)
+    np.add.at(hashes, ids, _row_hashes(db))
+
+    years = groups.size().reset_index()[[MFG, MODEL, YEAR]]
+    years['hash'] = hashes
+    # sorted by model and year, the previous row of a model is its prev year
+    mfg, model = years[MFG].to_numpy(), years[MODEL].to_numpy()
+    same_model = (mfg[1:] == mfg[:-1]) & (model[1:] == model[:-1])
+    prev = np.full(len(years.index), -1, dtype=np.int64)
+    prev[1:][same_model] = years[YEAR].to_numpy()[:-1][same_model]
+    years[PREV_YEAR] = prev
+
+    prev_hash = np.zeros(len(years.index), dtype=np.uint64)
+    prev_hash[1:][same_model] = hashes[:-1][same_model]
+    years['pair'] = hashes * np.uint64(1000003) ^ prev_hash
+    return years
+
+
+def _align(db, years):
+    """Return the rows of every model year of years outer merged with the
+    rows of its previous year on (mfg, model, size).
+
+    Columns row and row_prev are the positions of the rows in db, NaN for
+    a size of only one of the years.
+    """
+    pairs = years.loc[years[PREV_YEAR] >= 0, [MFG, MODEL, YEAR, PREV_YEAR,
+                                              'pair']]
+    rows = _keys(db.index)
+    rows['row'] = np.arange(len(rows.index))
+    current = rows.merge(pairs, on=[MFG, MODEL, YEAR])
+    previous = rows.rename(columns={YEAR: PREV_YEAR}).merge(
+        pairs, on=[MFG, MODEL, PREV_YEAR])
+    return current.merge(previous, how='outer',
+                         on=[MFG, MODEL, YEAR, PREV_YEAR, 'pair', SIZE],
+                         suffixes=('', '_prev'), indicator=True)
+
+
+def _report_index(db, aligned):
+    """Return the CHANGE_KEYS index of the aligned rows with the labels of
+    the db index levels."""
+    names = list(db.index.names)
+
+    def values(name):
+        level = db.index.levels[names.index(name)]
+        return np.asarray(level.astype(str), dtype=object)[
+            aligned[name].to_numpy()]
+
+    return pd.MultiIndex.from_arrays([
+        values(MFG), values(MODEL), aligned[YEAR].to_numpy(), values(SIZE)],
+        names=CHANGE_KEYS)
+
+
+def year_over_year(db, years=None):
+    """Compare the sizes of model years with the previous model year.
+
+    All model years are aligned in one merge on (mfg, model, size) of each
+    year with the rows of its previous year. Sizes of only one year are
+    added or removed. Deltas are current minus previous value, NaN if a
+    dimension is missing in one of the years.
+
+    Parameters:
+    -----------
+    db (pandas.DataFrame): database indexed by INDEX_KEYS
+    years (pandas.DataFrame): model years to compare, rows of
+        model_years(db), default all
+
+    Returns:
+    --------
+    pandas.DataFrame indexed by CHANGE_KEYS with prev_year, pair, status
+    and the delta of every dimension
+    """
+    if years is None:
+        years = model_years(db)
+    aligned = _align(db, years)
+
+    both = (aligned['_merge'] == 'both').to_numpy()
+    cur_row = aligned['row'].fillna(-1).to_numpy(dtype=np.int64)
+    prev_row = aligned['row_prev'].fillna(-1).to_numpy(dtype=np.int64)
+    dims = db.reindex(columns=DIMENSIONS).to_numpy(dtype=np.float64)
+    deltas = np.full((len(aligned.index), len(DIMENSIONS)), np.nan)
+    deltas[both] = dims[cur_row[both]] - dims[prev_row[both]]
+    # dimensions may be float32, do not report their binary noise
+    deltas = deltas.round(2)
+
+    with np.errstate(invalid='ignore'):
+        changed = (np.abs(deltas) > tolerances()).any(axis=1)
+    status = np.where(both, np.where(changed, CHANGED, SAME),
+                      np.where(cur_row >= 0, ADDED, REMOVED))
+
+    result = pd.DataFrame(deltas, columns=DIMENSIONS)
+    result.insert(0, PREV_YEAR, aligned[PREV_YEAR].to_numpy())
+    result.insert(1, 'pair', aligned['pair'].to_numpy(dtype=np.uint64))
+    result.insert(2, 'status', status)
+    return result.set_axis(_report_index(db, aligned)).sort_index()
+
+
+def summarize(changes):
+    """Return one row per model year of the year_over_year() report.
+
+    Columns are the number of sizes per status, the dimensions changed in
+    any size and the redesign flag, the index is (mfg, model, year,
+    prev_year).
+    """
+    columns = [SAME, CHANGED, ADDED, REMOVED, 'dimensions', 'redesign']
+    if changes.empty:
+        return pd.DataFrame(columns=columns, index=pd.MultiIndex.from_tuples(
+            [], names=[MFG, MODEL, YEAR, PREV_YEAR]))
+    changes = changes.sort_index()
+    # rows of a model year are adjacent in the sorted report
+    codes = np.column_stack(changes.index.codes[:3])
+    starts = np.flatnonzero(
+        np.r_[True, (codes[1:] != codes[:-1]).any(axis=1)])
+
+    result = changes[[PREV_YEAR]].iloc[starts].set_index(
+        PREV_YEAR, append=True).droplevel(SIZE)
+    status = changes['status'].to_numpy()
+    for name in (SAME, CHANGED, ADDED, REMOVED):
+        result[name] = np.add.reduceat((status == name).astype(np.int64),
+                                       starts)
+
+    with np.errstate(invalid='ignore'):
+        beyond = np.abs(changes[DIMENSIONS].to_numpy()) > tolerances()
+    changed = np.logical_or.reduceat(beyond, starts, axis=0)
+    # few distinct combinations, join the names once per combination
+    bit = 1 << np.arange(len(DIMENSIONS))
+    unique, inverse = np.unique(changed @ bit, return_inverse=True)
+    names = np.array(DIMENSIONS, dtype=object)
+    labels = np.array([','.join(names[(b & bit) != 0]) for b in unique],
+                      dtype=object)
+    result['dimensions'] = labels[inverse]
+
+    matched = result[SAME] + result[CHANGED]
+    result['redesign'] = ((matched == 0) |
+                          (result[CHANGED] >= REDESIGN_SHARE * matched))
+    return result
+
+
+# get() is the whole interface, the cache only owns the path of its file
+class ChangeCache:  # pylint: disable=too-few-public-methods
+    """Year-over-year report stored next to the database.
+
+    Size rows are cached per model year with a hash over the rows of the
+    model year and of its previous year. Only model years with a new hash,
+    i.e. newly imported, changed or with a new previous year, are compared
+    again, model years no longer in the database are dropped.
+    """
+
+    def __init__(self, database):
+        """Open the cache of database (file or directory)."""
+        self.path = os.path.normpath(database) + '.changes.csv'
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return None
+        return pd.read_csv(self.path, index_col=CHANGE_KEYS,
+                           dtype={MFG: str, MODEL: str, SIZE: str,
+                                  'pair': np.uint64})
+
+    def get(self, db):
+        """Return the year_over_year() report of db, only model years with
+        a new hash are compared.
+
+        Returns:
+        --------
+        (pandas.DataFrame, int): the report and the number of compared
+        model years
+        """
+        years = model_years(db)
+        years = years[years[PREV_YEAR] >= 0]
+        cached = self._load()
+        if cached is None:
+            cached = year_over_year(db, years.iloc[:0])
+        known = np.isin(years['pair'].to_numpy(), cached['pair'].to_numpy())
+        fresh = year_over_year(db, years[~known])
+
+        wanted = np.isin(cached['pair'].to_numpy(), years['pair'].to_numpy())
+        report = pd.concat([cached[wanted], fresh]).sort_index()
+
+        # keep exactly the model years of the current database, new model
+        # years are appended if no cached one changed
+        if not wanted.all() or not os.path.exists(self.path):
+            whole_numbers_as_int(report).to_csv(self.path)
+        elif (~known).any():
+            whole_numbers_as_int(fresh).to_csv(self.path, mode='a',
+                                               header=False)
+        return report, int((~known).sum())
@@ -1,13 +1,22 @@
 """Scrape and reformat bike geometry data of cube bikes."""
-import pandas as pd
-from .dataimporter import DataImporter
+from .discovery import CatalogSpec
+from .tablespec import (SpecImporter, TableSpec,)
 
 
-class CubeImporter(DataImporter):
+class CubeImporter(SpecImporter):
     """Website scraper and geometry table parser for www.cube.eu (2023)."""
 
     #: Compatible Manufacturer names for this importer, fixed
     MFG_NAME = 'cube'
+    #: Labels are the data-id attributes of the row headers
+    TABLE_SPEC = TableSpec(
+        table=('table', {'id': 'e-geometry-integration-table'}),
+        sizes='.//thead//td[@class="geometry-table-field"]',
+        rows='.//tbody/tr',
+        label='th[@class="e-geometry-table-row"]/@data-id',
+        values='td[@class="geometry-table-field"]')
+    #: Model pages are /de-de/cube-<model>-<color>/<article number>
+    CATALOG_SPEC = CatalogSpec(r'/de-de/cube-(?P<model>[^/]+)/\d+$')
 
     def __init__(self, *args, **kwargs):
         """Create an importer for cube bike data."""
@@ -25,47 +34,3 @@ class CubeImporter(DataImporter):
             "r": self.std_column_map["Reach"],
             "s": self.std_column_map["Stack"]
         }
-
-    def standardize_data(self, df):
-        """Map raw data to well-known properties."""
-        # manufacturer descriptions no longer needed
-        df.drop(columns=[1], inplace=True)
-        df = df.T  # frame sizes in columns, we want row
-        df.iloc[0] = df.iloc[0].apply(str.lower)
-        df.columns = df.iloc[0]
-        df = df.rename(columns=self.col_map)
-        df.set_index(self.MFG_FRAME_KEY, inplace=True)
-        # discard all other columns
-        df = df[self.col_map.values()]
-        # Delete lines that make no sense
-        df.drop(index=self.MFG_FRAME_KEY, inplace=True)
-
-        df = self.make_std_cols_numeric(df)
-        # Return dataframe without index
-        return df.reset_index()
-
-    def scrape(self, url):
-        """Retrieve and parse data from the website given by url."""
-        soup = self.get_soup(url)
-        geometrytable = soup.find('table',
-                                  attrs={'id': 'e-geometry-integration-table'})
-        col_head = [self.MFG_FRAME_KEY, self.MFG_DESC_KEY]
-
-        head = geometrytable.find('thead')
-        for td in head.findAll('td', attrs={'class': 'geometry-table-field'}):
-            col_head.append(td.text.strip())
-
-        df = pd.DataFrame(data=col_head).T
-
-        body = geometrytable.find('tbody')
-        for row in body.findAll('tr'):
-            prop = []
-            # description is a <th>
-            desc = row.find('th', attrs={'class': 'e-geometry-table-row'})
-            prop.append(desc.attrs['data-id'])
-            prop.append(desc.text.strip())
-            for td in row.findAll('td',
-                                  attrs={'class': 'geometry-table-field'}):
-                prop.append(td.text.strip())
-            df = pd.concat([df, pd.DataFrame(prop).T])
-        return df
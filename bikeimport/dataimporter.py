@@ -1,15 +1,14 @@
 """Common superclass for all manufacturer specific importers."""
 from abc import (ABC, abstractmethod,)
 import datetime
-import requests
-import pandas as pd
-from bs4 import BeautifulSoup
+import hashlib
 
 from .globals import (
     get_bike_categories,
     normalize,
     get_header,
 )
+from .numeric import (NumericParseError, to_numeric_frame,)
 
 
 class DataImporter(ABC):
@@ -28,6 +27,35 @@ class DataImporter(ABC):
     #: column for manufacturer description
     MFG_DESC_KEY = 'desc'
 
+    #: 'standardized' column names for well-known dimensions
+    std_column_map = {
+        'BBdrop'            : 'bb_drop',
+        'HeadTubeAngle'     : 'head_tube_angle',
+        'Chainstay'         : 'chain_stay',
+        'Reach'             : 'reach',
+        'SeatTube'          : 'seat_tube',
+        'SeatTubeAngle'     : 'seat_tube_angle',
+        'Stack'             : 'stack',
+        'StandOverHeight'   : 'stand_over_height',
+        'TopTube_hz'        : 'top_tube',
+        'Wheelbase'         : 'wheel_base',
+        'ForkRake'          : 'fork_rake'
+    }
+
+    #: Version of parse_table() and standardize_data(), bump on changes
+    #: to invalidate fingerprints of previously scraped pages
+    VERSION = 1
+
+    #: Parser backend building the tree of a page, one of tablespec.PARSERS
+    PARSER = 'lxml'
+    #: Element containing the geometry data as (tag name, attributes), in
+    #: stream mode pages are only downloaded up to its end. SpecImporters
+    #: take it from their TABLE_SPEC.
+    GEOMETRY_TABLE = None
+    #: discovery.CatalogSpec of the model pages in the catalog of the
+    #: manufacturer, None if models can not be discovered
+    CATALOG_SPEC = None
+
     def __init__(self, mfg, *args, **kwargs):
         """Create base class and setup common attributes.
 
@@ -37,49 +65,54 @@ class DataImporter(ABC):
         """
         self.mfg = mfg
         self.verbose = False
-        self.df = pd.DataFrame()
-
-        self.std_column_map = {
-            'BBdrop'            : 'bb_drop',
-            'HeadTubeAngle'     : 'head_tube_angle',
-            'Chainstay'         : 'chain_stay',
-            'Reach'             : 'reach',
-            'SeatTube'          : 'seat_tube',
-            'SeatTubeAngle'     : 'seat_tube_angle',
-            'Stack'             : 'stack',
-            'StandOverHeight'   : 'stand_over_height',
-            'TopTube_hz'        : 'top_tube',
-            'Wheelbase'         : 'wheel_base',
-            'ForkRake'          : 'fork_rake'
-        }
+        #: optional ResponseCache for downloaded pages
+        self.cache = None
+        #: optional session used instead of the shared per-host sessions
+        self.session = None
+        #: stop downloading a page once GEOMETRY_TABLE is complete
+        self.stream = False
+        self.parser = self.PARSER
+        self.parse_failures = None
 
         if 'verbose' in kwargs:
             self.verbose = kwargs['verbose']
-
-    def make_std_cols_numeric(self, df):
+        if 'cache' in kwargs:
+            self.cache = kwargs['cache']
+        if 'session' in kwargs:
+            self.session = kwargs['session']
+        if kwargs.get('parser'):
+            self.parser = kwargs['parser']
+        if 'stream' in kwargs:
+            self.stream = kwargs['stream']
+
+    def make_std_cols_numeric(self, df, errors='raise'):
         """
-        Prune dataframe of common errors.
+        Convert standardized columns to numbers.
 
-        Prune empty columns, make sure strings do not contain comma or
-        degree symbols.
+        Decimal commas, degree signs, units (mm, cm, in), ranges and
+        footnote markers are handled by vectorized string operations on
+        the standardized columns only.
 
         Parameters:
         -----------
         df (pandas.DataFrame) : to prune
+        errors (str) : 'raise' raises one NumericParseError listing all
+                       cells that are not numeric, 'coerce' sets them NaN
 
         Return:
         -------
         pandas.DataFrame
 
         """
-        # cleanup common string issues
-        df = df.applymap(
-            lambda x: str(x.replace(',', '.')) if isinstance(x, str) else x)
-        df = df.applymap(
-            lambda x: str(x.replace('°', '')) if isinstance(x, str) else x)
-
-        # make sure columns are numeric
-        df.loc[:, self.std_cols()] = df[self.std_cols()].apply(pd.to_numeric)
+        df, failures = to_numeric_frame(df, list(self.std_cols()))
+        #: cells of the last conversion that could not be parsed
+        self.parse_failures = failures
+        if not failures.empty:
+            if errors == 'raise':
+                raise NumericParseError(failures)
+            if self.verbose:
+                print(f"{self.mfg}: {len(failures)} cells not numeric")
+                print(failures.to_string())
 
         # Return dataframe without index
         return df
@@ -102,6 +135,41 @@ class DataImporter(ABC):
         """
 
     @abstractmethod
+    def extract_table(self, content, url=None):
+        """Return the geometry table of page content.
+
+        Manufacturer specific method has to be implemented in derived classes,
+        HTML importers are SpecImporters extracting their TABLE_SPEC.
+
+        Parameters:
+        -----------
+        content (bytes): page as returned by fetch()
+        url (str): optional url of the page for error messages
+
+        Returns:
+        --------
+        geometry table, the input of parse_table()
+
+        Raises:
+        -------
+        ValueError if the page has no geometry table
+        """
+
+    @abstractmethod
+    def parse_table(self, table):
+        """Parse the geometry table into a DataFrame of raw rows.
+
+        Manufacturer specific method has to be implemented in derived classes.
+
+        Parameters:
+        -----------
+        table: geometry table as returned by extract_table()
+
+        Returns:
+        --------
+        pandas.DataFrame: non-standardized dataframe
+        """
+
     def scrape(self, url):
         """Scrape data from website and return model as DataFrame.
 
@@ -113,9 +181,81 @@ class DataImporter(ABC):
         --------
         pandas.DataFrame: non-standardized dataframe
         """
+        return self.scrape_content(self.fetch(url), url)
+
+    def scrape_content(self, content, url=None):
+        """Return the model of already downloaded page content as DataFrame.
+
+        Does not access the network, e.g. to parse pages in other processes.
+
+        Parameters:
+        -----------
+        content (bytes): page as returned by fetch()
+        url (str): optional url of the page for error messages
+
+        Returns:
+        --------
+        pandas.DataFrame: non-standardized dataframe
+        """
+        return self.parse_table(self.extract_table(content, url))
+
+    def fingerprint(self, table):
+        """Return a hash of the geometry table and the importer version.
+
+        The fingerprint changes if the manufacturer changes the geometry
+        data or the importer VERSION is bumped, other page content does not
+        matter.
+
+        Parameters:
+        -----------
+        table: geometry table as returned by extract_table()
 
-    def get_soup(self, url):
-        """Create a BeautifulSoup parser for given URL.
+        Returns:
+        --------
+        str: hex digest
+        """
+        h = hashlib.sha256(
+            f"{self.mfg}/{self.VERSION}/{self.parser}\n".encode('utf-8'))
+        h.update(str(table).encode('utf-8'))
+        return h.hexdigest()
+
+    def fetch(self, url):
+        """Download the page given by URL, use the response cache if set.
+
+        In stream mode (without cache) only the page up to the end of
+        GEOMETRY_TABLE is downloaded and the source of that element is
+        returned instead of the page.
+
+        Parameters:
+        -----------
+        url (str): url of bike model website containing geometry data
+
+        Returns:
+        --------
+        bytes: page content
+        """
+        # requests is only imported when something is downloaded
+        from .session import (  # pylint: disable=import-outside-toplevel
+            get_session,)
+
+        session = self.session or get_session(url)
+        if self.cache:
+            return self.cache.get(url, session=session)
+        if self.stream and self.GEOMETRY_TABLE:
+            from .streaming import (  # pylint: disable=import-outside-toplevel
+                stream_element,)
+            r = session.get(url, headers=get_header(), timeout=5, stream=True)
+            try:
+                content, _ = stream_element(r, *self.GEOMETRY_TABLE)
+            finally:
+                # the rest of the page is not read, do not reuse the connection
+                r.close()
+            return content
+        r = session.get(url, headers=get_header(), timeout=5)
+        return r.content
+
+    def get_geometry_table(self, url):
+        """Download the page given by url and return its geometry table.
 
         Parameters:
         -----------
@@ -123,11 +263,9 @@ class DataImporter(ABC):
 
         Returns:
         --------
-        BeautifulSoup parser object
+        geometry table as returned by extract_table()
         """
-        r = requests.get(url, headers=get_header(), timeout=5)
-        soup = BeautifulSoup(r.content, 'html5lib')
-        return soup
+        return self.extract_table(self.fetch(url), url)
 
     def std_cols(self):
         """
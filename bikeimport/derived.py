@@ -0,0 +1,122 @@
+"""Geometry values derived from the standardized dimensions."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .numeric import whole_numbers_as_int
+
+#: Bead seat diameter of 700c/29" rims in mm
+RIM_DIAMETER = 622
+#: Tyre width in mm used for the wheel radius
+TYRE_WIDTH = 28
+
+#: Standardized columns the derived values are computed from
+INPUT_COLUMNS = ['stack', 'reach', 'head_tube_angle', 'seat_tube_angle',
+                 'chain_stay', 'wheel_base', 'bb_drop', 'fork_rake']
+
+#: Derived columns
+DERIVED_COLUMNS = ['trail', 'rear_center', 'front_center',
+                   'effective_top_tube', 'rc_fc_ratio', 'stack_reach_ratio']
+
+
+def derive(db, tyre_width=TYRE_WIDTH):
+    """Compute derived geometry for all rows of db in one vectorized pass.
+
+    - trail: (R*cos(HTA) - fork_rake) / sin(HTA), R = wheel radius
+    - rear_center: horizontal BB to rear axle, sqrt(chain_stay^2 - bb_drop^2)
+      or chain_stay if bb_drop is unknown
+    - front_center: horizontal BB to front axle, wheel_base - rear_center
+    - effective_top_tube: horizontal top tube, reach + stack / tan(STA)
+    - rc_fc_ratio: rear_center / front_center
+    - stack_reach_ratio: stack / reach
+
+    Values with missing inputs are NaN, e.g. trail for frames without
+    fork_rake (Ridley, Cube), all others are still computed.
+
+    Parameters:
+    -----------
+    db (pandas.DataFrame): standardized data
+    tyre_width (float): tyre width in mm for the wheel radius
+
+    Returns:
+    --------
+    pandas.DataFrame with DERIVED_COLUMNS and the index of db
+    """
+    cols = {c: (db[c].to_numpy(dtype=np.float64) if c in db
+                else np.full(len(db.index), np.nan))
+            for c in INPUT_COLUMNS}
+    hta = np.radians(cols['head_tube_angle'])
+    sta = np.radians(cols['seat_tube_angle'])
+    radius = RIM_DIAMETER / 2 + tyre_width
+
+    cs, drop = cols['chain_stay'], cols['bb_drop']
+    rear_center = np.where(np.isnan(drop), cs, np.sqrt(cs ** 2 - drop ** 2))
+    front_center = cols['wheel_base'] - rear_center
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        derived = {
+            'trail': (radius * np.cos(hta) - cols['fork_rake']) / np.sin(hta),
+            'rear_center': rear_center,
+            'front_center': front_center,
+            'effective_top_tube': cols['reach'] + cols['stack'] / np.tan(sta),
+            'rc_fc_ratio': rear_center / front_center,
+            'stack_reach_ratio': cols['stack'] / cols['reach'],
+        }
+    return pd.DataFrame(derived, index=db.index).round(4)
+
+
+def row_hashes(db, tyre_width=TYRE_WIDTH):
+    """Return a hash per row over its key, the inputs and the tyre width."""
+    inputs = db.reindex(columns=INPUT_COLUMNS).astype(np.float64)
+    inputs['tyre_width'] = float(tyre_width)
+    return pd.util.hash_pandas_object(inputs, index=True).to_numpy()
+
+
+# callers only read through get(), the rest is the cache file handling
+class DerivedCache:  # pylint: disable=too-few-public-methods
+    """Derived geometry stored next to the database.
+
+    Rows are cached by a hash over key and input dimensions, rows that were
+    added or changed get a new hash and are computed again, rows no longer
+    in the database are dropped from the cache.
+    """
+
+    def __init__(self, database, tyre_width=TYRE_WIDTH):
+        """Open the cache of database (file or directory)."""
+        self.path = os.path.normpath(database) + '.derived.csv'
+        self.tyre_width = tyre_width
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=DERIVED_COLUMNS,
+                                index=pd.Index([], dtype=np.uint64, name='hash'))
+        cached = pd.read_csv(self.path, index_col=0,
+                             dtype={'hash': np.uint64})
+        return cached[~cached.index.duplicated()]
+
+    def get(self, db):
+        """Return derived geometry for db, only new rows are computed.
+
+        Returns:
+        --------
+        (pandas.DataFrame, int): derived values indexed like db and the
+        number of computed rows
+        """
+        hashes = row_hashes(db, self.tyre_width)
+        cached = self._load()
+        known = np.isin(hashes, cached.index.to_numpy())
+        fresh = derive(db[~known], self.tyre_width)
+
+        values = pd.concat([
+            cached,
+            fresh.set_axis(pd.Index(hashes[~known], name='hash')),
+        ])
+        values = values[~values.index.duplicated()]
+        result = values.loc[hashes].set_axis(db.index)
+
+        # keep exactly the rows of the current database
+        if (~known).any() or len(values.index) != len(set(hashes)):
+            whole_numbers_as_int(values.loc[np.unique(hashes)]).to_csv(
+                self.path)
+        return result, int((~known).sum())
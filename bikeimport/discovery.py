@@ -0,0 +1,357 @@
+"""Discover model pages by crawling the catalog pages of manufacturers.
+
+Starting from catalog (category) pages, links are extracted and split into
+model pages, which are reported in the schema of all-urls.csv, and further
+catalog pages (sub-categories, pagination), which are crawled as well.
+Pages are fetched by a pool of threads from a bounded frontier, every host
+sees at most per_host requests at once and one request every delay
+seconds. Visited URLs are remembered as 64 bit hashes.
+"""
+import hashlib
+import re
+import threading
+from collections import (OrderedDict, deque, namedtuple,)
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import (urldefrag, urljoin, urlsplit, urlunsplit,)
+
+from .globals import get_header
+from .scheduler import (HostRateLimiter, host_of,)
+
+#: Columns of the URL list read by scrape.py
+URL_COLUMNS = ['year', 'mfg', 'model', 'category', 'url']
+
+#: Limits of a crawl: workers threads fetching pages, per_host pages of one
+#: host fetched at the same time, delay seconds between two requests to the
+#: same host, max_pages catalog pages fetched at most (start pages are
+#: fetched in any case), max_depth links followed from a start page at most,
+#: frontier_size pages queued at most and timeout seconds to wait for a
+#: response
+CrawlLimits = namedtuple('CrawlLimits',
+                         ['workers', 'per_host', 'delay', 'max_pages',
+                          'max_depth', 'frontier_size', 'timeout'],
+                         defaults=[4, 2, 1.0, 1000, 3, 10000, 10])
+
+
+class CatalogSpec:
+    """Links of a manufacturer's catalog pages.
+
+    Patterns are searched in the path (and query) of absolute link URLs on
+    the host of the catalog page.
+    """
+
+    def __init__(self, products, follow=None, links='//a/@href'):
+        """Describe the catalog of a manufacturer.
+
+        Parameters:
+        -----------
+        products (str or tuple of str): regular expression of model
+            pages, the group 'model' is the model name, e.g.
+            r'/rose-(?P<model>.+)-\\d+$', of a tuple the first matching
+            expression is used
+        follow (str): regular expression of further catalog pages, default
+            pages below the directory of the start page
+        links (str): XPath of the link targets on catalog pages
+        """
+        if isinstance(products, str):
+            products = (products,)
+        self.products = [re.compile(p) for p in products]
+        self.follow = re.compile(follow) if follow else None
+        self.links = links
+
+    def model(self, url):
+        """Return the model name if url is a model page, otherwise None."""
+        parts = urlsplit(url)
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        for products in self.products:
+            match = products.search(path)
+            if match is not None:
+                return (match.groupdict().get('model') or
+                        path.strip('/').split('/')[-1])
+        return None
+
+    def is_catalog(self, url, start):
+        """Return True if url is a further catalog page of the crawl from
+        the start page, url and start are normalized."""
+        if self.follow is not None:
+            return self.follow.search(urlsplit(url).path) is not None
+        return url.startswith(start[:start.rfind('/') + 1])
+
+
+def normalize_url(url):
+    """Return url without fragment, with lower case scheme and host."""
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                       parts.path or '/', parts.query, ''))
+
+
+def url_hash(url):
+    """Return a 64 bit hash of the normalized url."""
+    digest = hashlib.blake2b(normalize_url(url).encode('utf-8'),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class SeenSet:
+    """Thread safe set of visited URLs, kept as 64 bit hashes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes = set()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, url):
+        return url_hash(url) in self._hashes
+
+    def add(self, url):
+        """Add url, return False if it was seen before."""
+        h = url_hash(url)
+        with self._lock:
+            if h in self._hashes:
+                return False
+            self._hashes.add(h)
+            return True
+
+
+#: A catalog page to crawl, catalog is the source record with year, mfg,
+#: category, url and spec, order the position of the catalog in the input
+#: (the first catalog listing a model gives its category)
+_Page = namedtuple('_Page', ['url', 'depth', 'catalog', 'order'])
+
+
+class Frontier:
+    """Bounded queue of pages, round robin over hosts with at most per_host
+    pages of a host in flight.
+
+    At most frontier_size pages are queued at once and max_pages pages are
+    queued over the whole crawl, see CrawlLimits.
+    """
+
+    def __init__(self, limits=CrawlLimits()):
+        self.limits = limits
+        #: pages not queued because the frontier was full or max_pages
+        #: pages were queued already
+        self.dropped = 0
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()
+        # pages in flight per host
+        self._active = {}
+        self._size = 0
+        # pages queued so far, start pages included
+        self._scheduled = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, page, limit=True):
+        """Queue page, return False if it was dropped.
+
+        Pages pushed with limit False, e.g. start pages, do not count
+        against max_pages.
+        """
+        with self._cond:
+            if (limit and self._scheduled >= self.limits.max_pages) or \
+                    self._size >= self.limits.frontier_size:
+                self.dropped += 1
+                return False
+            self._queues.setdefault(host_of(page.url), deque()).append(page)
+            self._size += 1
+            self._scheduled += 1
+            self._cond.notify()
+            return True
+
+    def pop(self):
+        """Return the next page, None once all pages are done.
+
+        Blocks while every host with queued pages has per_host pages in
+        flight or pages in flight may still add pages.
+        """
+        with self._cond:
+            while True:
+                for host, queue in self._queues.items():
+                    if queue and \
+                            self._active.get(host, 0) < self.limits.per_host:
+                        page = queue.popleft()
+                        # next pop starts with another host
+                        self._queues.move_to_end(host)
+                        self._active[host] = self._active.get(host, 0) + 1
+                        self._size -= 1
+                        return page
+                if self._size == 0 and not any(self._active.values()):
+                    self._cond.notify_all()
+                    return None
+                self._cond.wait()
+
+    def done(self, page):
+        """Mark a page returned by pop() as finished."""
+        with self._cond:
+            self._active[host_of(page.url)] -= 1
+            self._cond.notify_all()
+
+
+class PageFetcher:
+    """Fetch pages with the delay per host of the crawl limits and keep
+    count of fetched and failed pages."""
+
+    def __init__(self, limits=CrawlLimits(), session=None):
+        """Create a fetcher.
+
+        Parameters:
+        -----------
+        limits (CrawlLimits): delay and timeout are used
+        session: optional requests compatible session for all hosts
+        """
+        self.limits = limits
+        self.session = session
+        self.limiter = HostRateLimiter(limits.delay)
+        #: (url, error) of pages that could not be fetched
+        self.failed = []
+        #: number of fetched pages
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, url):
+        """Return the content of url, None if it is not HTTP 200."""
+        # requests is only imported when something is downloaded
+        from .session import (  # pylint: disable=import-outside-toplevel
+            get_session,)
+
+        self.limiter.wait(url)
+        session = self.session or get_session(url)
+        r = session.get(url, headers=get_header(), timeout=self.limits.timeout)
+        with self._lock:
+            self.fetched += 1
+        if r.status_code != 200:
+            self.fail(url, f"HTTP {r.status_code}")
+            return None
+        return r.content
+
+    def fail(self, url, error):
+        """Record that url could not be fetched or read."""
+        with self._lock:
+            self.failed.append((url, error))
+
+
+class CatalogCrawler:
+    """Crawl catalog pages concurrently and collect model pages."""
+
+    def __init__(self, limits=CrawlLimits(), session=None, progress=None):
+        """Create a crawler.
+
+        Parameters:
+        -----------
+        limits (CrawlLimits): workers, rates and sizes of the crawl
+        session: optional requests compatible session for all hosts
+        progress (callable): optional progress(url) after each page
+        """
+        self.limits = limits
+        self.progress = progress
+        self.fetcher = PageFetcher(limits, session)
+        self.frontier = Frontier(limits)
+        self.seen = SeenSet()
+        self._lock = threading.Lock()
+        self._models = {}
+
+    def crawl(self, catalogs):
+        """Crawl from the start pages and return the model pages found.
+
+        Parameters:
+        -----------
+        catalogs (list of dict): start pages with the keys year, mfg,
+            category, url and spec (CatalogSpec)
+
+        Returns:
+        --------
+        list of dict: rows with URL_COLUMNS, sorted by mfg, model and url
+        """
+        for order, catalog in enumerate(catalogs):
+            url = normalize_url(catalog['url'])
+            if self.seen.add(url):
+                # start pages are crawled in any case
+                self.frontier.push(_Page(url, 0, catalog, order), limit=False)
+
+        workers = self.limits.workers
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._work) for _ in range(workers)]
+            for future in futures:
+                future.result()
+
+        rows = [row for _, row in self._models.values()]
+        return sorted(rows, key=lambda r: (r['mfg'], r['model'], r['url']))
+
+    @property
+    def failed(self):
+        """(url, error) of pages that could not be fetched."""
+        return self.fetcher.failed
+
+    @property
+    def fetched(self):
+        """Number of fetched pages."""
+        return self.fetcher.fetched
+
+    @property
+    def dropped(self):
+        """Number of links not followed for max_pages or frontier_size."""
+        return self.frontier.dropped
+
+    def _work(self):
+        while True:
+            page = self.frontier.pop()
+            if page is None:
+                return
+            try:
+                content = self.fetcher.fetch(page.url)
+                if content is not None:
+                    self._visit(page, content)
+            except Exception as e:  # pylint: disable=broad-except
+                # one broken page does not end the crawl
+                self.fetcher.fail(page.url, f"{type(e).__name__}: {e}")
+            finally:
+                self.frontier.done(page)
+                if self.progress:
+                    self.progress(page.url)
+
+    def _visit(self, page, content):
+        """Record the model pages linked by page and queue catalog pages."""
+        # lxml is only needed by the crawl
+        import lxml.html  # pylint: disable=import-outside-toplevel
+
+        catalog = page.catalog
+        spec = catalog['spec']
+        try:
+            root = lxml.html.document_fromstring(content)
+        except lxml.etree.ParserError:
+            return
+        host = host_of(page.url)
+        start = normalize_url(catalog['url'])
+
+        for href in root.xpath(spec.links):
+            url = normalize_url(urljoin(page.url, str(href).strip()))
+            if not url.startswith(('http://', 'https://')) or \
+                    host_of(url) != host:
+                continue
+            model = spec.model(url)
+            if model is not None:
+                self._add_model(url, model, page)
+                continue
+            if page.depth >= self.limits.max_depth or \
+                    not spec.is_catalog(url, start) or not self.seen.add(url):
+                continue
+            self.frontier.push(_Page(url, page.depth + 1, catalog, page.order))
+
+    def _add_model(self, url, model, page):
+        h = url_hash(url)
+        catalog = page.catalog
+        with self._lock:
+            known = self._models.get(h)
+            if known is not None and known[0] <= page.order:
+                return
+            self._models[h] = (page.order, {
+                'year': catalog['year'],
+                'mfg': catalog['mfg'],
+                'model': model,
+                'category': catalog['category'],
+                'url': url,
+            })
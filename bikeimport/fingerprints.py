@@ -0,0 +1,61 @@
+"""Remember fingerprints of scraped pages to skip unchanged ones."""
+import json
+import os
+import threading
+
+from .atomic import write_atomic
+
+#: Fields of a scrape record identifying the import job of a page
+JOB_KEYS = ['mfg', 'model', 'year', 'category', 'url']
+
+
+def job_key(record):
+    """Return the key of the fingerprint of a scrape record.
+
+    The same page imported as another model, year or category is another
+    job, its fingerprint is not shared. The importer VERSION is part of
+    the fingerprint itself.
+    """
+    return ' '.join(str(record.get(key)) for key in JOB_KEYS)
+
+
+class FingerprintStore:
+    """Fingerprint per import job of the last successfully imported page.
+
+    Jobs are scrape records, see job_key(). Fingerprints are recorded with
+    set() but only become known (and are written) with commit(), i.e. once
+    the data was stored.
+    """
+
+    def __init__(self, path):
+        """Load fingerprints from the JSON file path, if it exists."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._known = {}
+        self._pending = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._known = json.load(f)
+
+    def get(self, record):
+        """Return the fingerprint record was imported with or None."""
+        with self._lock:
+            return self._known.get(job_key(record))
+
+    def unchanged(self, record, fingerprint):
+        """Return True if record was imported with the same fingerprint."""
+        with self._lock:
+            return self._known.get(job_key(record)) == fingerprint
+
+    def set(self, record, fingerprint):
+        """Record the fingerprint of a newly imported page."""
+        with self._lock:
+            self._pending[job_key(record)] = fingerprint
+
+    def commit(self):
+        """Accept recorded fingerprints and write them to disk."""
+        with self._lock:
+            self._known.update(self._pending)
+            self._pending.clear()
+            write_atomic(self.path,
+                         json.dumps(self._known, indent=1, sort_keys=True))
@@ -0,0 +1,136 @@
+"""Find frames matching a rider's target stack and reach."""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .dataimporter import DataImporter
+from .globals import normalize
+
+#: head tube angle assumed for spacers if a frame has none
+DEFAULT_HEAD_TUBE_ANGLE = 73.0
+
+#: Target of FitIndex.query(): stack and reach in mm, the accepted
+#: deviations stack_tol and reach_tol, spacers mm of headset spacers that
+#: may be added and stem mm the stem may be longer or shorter
+FitTarget = namedtuple('FitTarget',
+                       ['stack', 'reach', 'stack_tol', 'reach_tol',
+                        'spacers', 'stem'],
+                       defaults=[10, 5, 0, 0])
+
+
+class FitIndex:
+    """Frames sorted by stack for stack/reach window queries.
+
+    A query does a binary search for the stack window and only looks at
+    the frames inside it, the database is not scanned.
+
+    Headset spacers (up to spacers mm) raise the handlebar along the steerer:
+    stack grows by t*sin(HTA) and reach shrinks by t*cos(HTA). A different
+    stem changes the reach by up to +-stem mm. Frames that reach the target
+    window with some spacer/stem setup are returned with that setup.
+    """
+
+    def __init__(self, db):
+        """Build the index.
+
+        Parameters:
+        -----------
+        db (pandas.DataFrame): standardized database indexed by
+            (mfg, model, year, mfg_dim_names)
+        """
+        db = db[db['stack'].notna() & db['reach'].notna()]
+        order = np.argsort(db['stack'].to_numpy(dtype=np.float64),
+                           kind='stable')
+        db = db.iloc[order]
+        self.keys = db.index
+        self.stack = db['stack'].to_numpy(dtype=np.float64)
+        self.reach = db['reach'].to_numpy(dtype=np.float64)
+        hta = db['head_tube_angle'].to_numpy(dtype=np.float64)
+        hta = np.radians(np.where(np.isnan(hta), DEFAULT_HEAD_TUBE_ANGLE, hta))
+        self.sin_hta = np.sin(hta)
+        self.cos_hta = np.cos(hta)
+        if DataImporter.CAT_KEY in db:
+            self.category = db[DataImporter.CAT_KEY].to_numpy(dtype=object)
+        else:
+            self.category = np.full(len(db.index), None, dtype=object)
+        self.year = db.index.get_level_values(DataImporter.YEAR_KEY).to_numpy()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def query(self, target, category=None, year=None):
+        """Return frames reaching the target window of a FitTarget.
+
+        Parameters:
+        -----------
+        target (FitTarget): stack/reach window and allowed adjustments
+        category (str): optional bike category, e.g. 'race'
+        year (int): optional model year
+
+        Returns:
+        --------
+        pandas.DataFrame sorted by 'distance' to the target with the frame
+        'stack' and 'reach', the 'spacers' and 'stem' change needed, their
+        total 'adjustment' in mm and the resulting 'eff_stack' and
+        'eff_reach'. Frames at the same distance, e.g. all frames reaching
+        the target, are sorted by the adjustment they need.
+        """
+        # spacers can only raise the stack, at most by spacers mm
+        lo = np.searchsorted(self.stack,
+                             target.stack - target.stack_tol - target.spacers,
+                             'left')
+        hi = np.searchsorted(self.stack, target.stack + target.stack_tol,
+                             'right')
+        rows = np.arange(lo, hi)
+        if category:
+            rows = rows[self.category[rows] == normalize(category)]
+        if year:
+            rows = rows[self.year[rows] == int(year)]
+
+        rows, t, u = self._setup(rows, target)
+        eff_stack = self.stack[rows] + t * self.sin_hta[rows]
+        eff_reach = self.reach[rows] - t * self.cos_hta[rows] + u
+        distance = np.hypot(eff_stack - target.stack,
+                            eff_reach - target.reach)
+        adjustment = t + np.abs(u)
+        # distances equal up to float noise tie, least adjustment first
+        order = np.lexsort((adjustment, distance.round(6)))
+        result = pd.DataFrame({
+            'distance': distance,
+            'stack': self.stack[rows],
+            'reach': self.reach[rows],
+            'spacers': t,
+            'stem': u,
+            'adjustment': adjustment,
+            'eff_stack': eff_stack,
+            'eff_reach': eff_reach,
+            DataImporter.CAT_KEY: self.category[rows],
+        }, index=self.keys[rows])
+        return result.iloc[order]
+
+    def _setup(self, rows, target):
+        """Return the rows that fit target with their spacers and stem change.
+
+        Returns:
+        --------
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray): fitting rows, spacer
+        height and stem change of each
+        """
+        s = self.stack[rows]
+        r = self.reach[rows]
+        sin, cos = self.sin_hta[rows], self.cos_hta[rows]
+        stack, reach = target.stack, target.reach
+
+        # spacer height t in [0, spacers] giving stack inside the window ...
+        t_lo = np.maximum((stack - target.stack_tol - s) / sin, 0)
+        t_hi = np.minimum((stack + target.stack_tol - s) / sin, target.spacers)
+        # ... and reach r - t*cos + stem change inside the window
+        t_lo = np.maximum(t_lo, (r - reach - target.reach_tol - target.stem) / cos)
+        t_hi = np.minimum(t_hi, (r - reach + target.reach_tol + target.stem) / cos)
+        fits = t_lo <= t_hi
+
+        # closest to the target stack within the feasible spacer range
+        t = np.clip((stack - s[fits]) / sin[fits], t_lo[fits], t_hi[fits])
+        u = np.clip(reach - (r[fits] - t * cos[fits]), -target.stem, target.stem)
+        return rows[fits], t, u
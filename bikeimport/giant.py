@@ -1,13 +1,27 @@
 """Scrape and reformat bike geometry data of giant bikes."""
-import pandas as pd
-from .dataimporter import DataImporter
+from .discovery import CatalogSpec
+from .tablespec import (SpecImporter, TableSpec,)
 
 
-class GiantImporter(DataImporter):
+class GiantImporter(SpecImporter):
     """Website scraper and geometry table parser for giant bikes (2023)."""
 
     #: Compatible Manufacturer names for this importer, fixed
     MFG_NAME = 'giant'
+    #: Values are spans in mm, inch or degrees, the inch spans are dropped
+    TABLE_SPEC = TableSpec(
+        table=('div', {'id': 'geometrytable'}),
+        sizes='.//tr[@class="heading"]/th[@name="framesize"]',
+        rows='.//tr[@class="property"]',
+        label='td[@class="code"]',
+        values='td[@class="value"]',
+        exclude=('value-inch',))
+    #: Model pages are /de/<model>[-<year>], model names have at least three
+    #: parts (tcr-advanced-sl), single words are shop pages (/de/stores).
+    #: Catalog pages are .html files in the same directory.
+    CATALOG_SPEC = CatalogSpec(
+        r'/de/(?P<model>[a-z0-9]+(?:-[a-z0-9]+){2,}?)(?:-20\d\d)?$',
+        follow=r'/de/[^/]+\.html$')
 
     def __init__(self, *args, **kwargs):
         """Create an importer for giant-bikes."""
@@ -26,55 +40,3 @@ class GiantImporter(DataImporter):
             "l": self.std_column_map["Stack"],
             "f": self.std_column_map["ForkRake"]
         }
-
-    def standardize_data(self, df):
-        """Map raw data to well-known properties."""
-        # Column 1 should contain MFG_FRAME_KEY='MfgDimNames'
-        # Column 2 is Giants descriptions for letters
-        df = df.T  # Transpose to make properties columns and sizes the index
-        # Line 0 is the column header
-        df.iloc[0] = df.iloc[0].apply(str.lower)
-        df.columns = df.iloc[0]
-        df = df.rename(columns=self.col_map)
-        df = df.drop([0, 1])  # MfgDimNames and row with Giant descriptions
-        df.set_index(self.MFG_FRAME_KEY, inplace=True)
-        # discard all other columns
-        df = df[self.std_cols()]
-        # sometimes the csv/google spreadsheet exports empty cols/rows
-        df.dropna(how='all', inplace=True)
-
-        df = self.make_std_cols_numeric(df)
-        # Return dataframe without index
-        return df.reset_index()
-
-    def scrape(self, url):
-        """Retrieve and parse data from the website given by url."""
-        def is_not_customary(tag):
-            return not (tag.has_attr('class') and
-                        'value-inch' in tag.attrs['class'])
-
-        soup = self.get_soup(url)
-        geometrytable = soup.find('div', attrs={'id': 'geometrytable'})
-        col_head = [self.MFG_FRAME_KEY, 'Desc']
-
-        for row in geometrytable.findAll('tr', attrs={'class': 'heading'}):
-            for td in row.findAll('th', attrs={'name': 'framesize'}):
-                col_head.append(td.text)
-        df = pd.DataFrame(data=col_head).T
-
-        for row in geometrytable.findAll('tr', attrs={'class': 'property'}):
-            prop = []
-            for td in row.findAll('td'):
-                if td.attrs['class'] == ['code']:
-                    prop.append(td.string)
-                if td.attrs['class'] == ['name']:
-                    prop.append(td.contents[0])
-                if td.attrs['class'] == ['value']:
-                    # Table data contains spans with either no class (text),
-                    # ['value' 'value-mm'] ['value' 'value-inch'] or
-                    # ['degrees'] read all except inches
-                    x = td.find(is_not_customary)
-                    prop.append(x.text)
-
-            df = pd.concat([df, pd.DataFrame(prop).T])
-        return df
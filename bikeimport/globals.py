@@ -7,6 +7,12 @@ SCRAPE_HEADERS = {
           'Connection': 'keep-alive'
       }
 
+#: Database formats, see bikeimport.storage
+DB_FORMATS = ['csv', 'parquet']
+
+#: Policies for rows already in the database, see bikeimport.storage
+CONFLICT_POLICIES = ['replace', 'keep', 'error']
+
 def get_header():
     return SCRAPE_HEADERS
 
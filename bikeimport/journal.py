@@ -0,0 +1,100 @@
+"""Checkpoint journal for crash-safe, resumable scrape runs."""
+import glob
+import hashlib
+import os
+import shutil
+import threading
+
+import pandas as pd
+
+from .atomic import atomic_path
+
+#: Columns of the scrape source file kept in the retry list
+RECORD_KEYS = ['year', 'mfg', 'model', 'category', 'url']
+
+
+class RunJournal:
+    """Directory with the standardized result of every finished record.
+
+    Layout of path:
+      done/<key>.csv  - standardized frame of a finished record
+      done/<key>.skip - record finished without data (unchanged page)
+      failed.csv      - records that raised, in the scrape source format
+                        with an additional 'error' column
+    """
+
+    def __init__(self, path):
+        """Open or create the journal in directory path."""
+        self.path = path
+        self.done_dir = os.path.join(path, 'done')
+        self.failed_path = os.path.join(path, 'failed.csv')
+        self._lock = threading.Lock()
+        self._failed = []
+        os.makedirs(self.done_dir, exist_ok=True)
+
+    @staticmethod
+    def key(record):
+        """Return the file name key of a record."""
+        text = '|'.join(str(record.get(k)) for k in RECORD_KEYS)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _done_path(self, record, ext):
+        return os.path.join(self.done_dir, self.key(record) + ext)
+
+    def is_done(self, record):
+        """Return True if record finished in this or a previous run."""
+        return (os.path.exists(self._done_path(record, '.csv')) or
+                os.path.exists(self._done_path(record, '.skip')))
+
+    def save(self, record, df):
+        """Record the standardized frame of a finished record.
+
+        Parameters:
+        -----------
+        record (dict): scrape source record
+        df (pandas.DataFrame): standardized data, None if there is none
+        """
+        if df is None:
+            path = self._done_path(record, '.skip')
+            with open(path, 'w', encoding='utf-8'):
+                pass
+            return
+        path = self._done_path(record, '.csv')
+        with atomic_path(path) as tmp:
+            df.to_csv(tmp, mode='x')
+
+    def load(self, record):
+        """Return the frame of a finished record or None."""
+        path = self._done_path(record, '.csv')
+        if not os.path.exists(path):
+            return None
+        return pd.read_csv(path, header=0, index_col=[0, 1, 2, 3])
+
+    def fail(self, record, error):
+        """Put record on the retry list."""
+        with self._lock:
+            self._failed.append({**{k: record.get(k) for k in RECORD_KEYS},
+                                 'error': f"{type(error).__name__}: {error}"})
+            pd.DataFrame(self._failed).to_csv(self.failed_path, index=False)
+
+    def failed(self):
+        """Return records that failed in this run."""
+        return list(self._failed)
+
+    def results(self, records):
+        """Return frames of all finished records in the order of records."""
+        frames = []
+        for record in records:
+            df = self.load(record)
+            if df is not None:
+                frames.append(df)
+        return frames
+
+    def clear_done(self):
+        """Remove finished records, e.g. after they were stored."""
+        for path in glob.glob(os.path.join(self.done_dir, '*')):
+            os.remove(path)
+
+    def remove(self):
+        """Remove the whole journal."""
+        shutil.rmtree(self.path, ignore_errors=True)
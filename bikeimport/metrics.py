@@ -0,0 +1,245 @@
+"""Per-stage timing and throughput of scrape runs."""
+import json
+import threading
+import time
+
+from .atomic import write_atomic
+
+#: Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, float('inf'))
+
+#: Prefix of all Prometheus metric names
+PREFIX = 'bikeimport'
+
+#: Counters with their Prometheus help text
+COUNTERS = {
+    'pages': 'Pages scraped',
+    'bytes': 'Bytes of pages fetched',
+    'rows': 'Standardized rows produced',
+    'unchanged': 'Pages skipped as unchanged',
+    'failed': 'Records that failed',
+}
+
+
+class Histogram:
+    """Latency histogram with fixed BUCKETS."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """Add one observation."""
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Return the q-quantile estimated from the buckets."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for bound, n in zip(BUCKETS, self.counts):
+            if n and seen + n >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = bound
+        return self.max
+
+    def to_dict(self):
+        """Return the histogram as JSON serializable dict."""
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'max': round(self.max, 6),
+            'p50': round(self.quantile(0.5), 6),
+            'p90': round(self.quantile(0.9), 6),
+            'buckets': {str(b): n for b, n in zip(BUCKETS, self.counts)},
+        }
+
+
+class _Timer:
+    """Context manager observing its duration."""
+
+    __slots__ = ('metrics', 'stage', 'mfg', 'start')
+
+    def __init__(self, metrics, stage, mfg):
+        self.metrics = metrics
+        self.stage = stage
+        self.mfg = mfg
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, self.mfg,
+                             time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Latency histograms per stage and manufacturer and counters per
+    manufacturer of one run, safe to use from worker threads.
+
+    Stages of scrape.py:
+      fetch       - download (or cache lookup) of the page
+      parse       - html parsing and geometry table lookup
+      table       - parse_table(), geometry table to raw frame
+      standardize - standardize_data()
+      meta        - append_meta_info()
+      write       - database write, mfg 'all'
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {name: {} for name in COUNTERS}
+
+    def __getstate__(self):
+        # metrics of worker processes are sent back to be merged
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def timer(self, stage, mfg):
+        """Return a context manager timing stage for mfg."""
+        return _Timer(self, stage, mfg)
+
+    def merge(self, other):
+        """Add histograms and counters of other, e.g. of a worker process."""
+        if not isinstance(other, Metrics):
+            return
+        with self._lock:
+            for key, hist in other.histograms.items():
+                mine = self.histograms.setdefault(key, Histogram())
+                mine.counts = [a + b for a, b in zip(mine.counts, hist.counts)]
+                mine.count += hist.count
+                mine.sum += hist.sum
+                mine.max = max(mine.max, hist.max)
+            for name, counter in other.counters.items():
+                mine = self.counters[name]
+                for mfg, n in counter.items():
+                    mine[mfg] = mine.get(mfg, 0) + n
+
+    def observe(self, stage, mfg, seconds):
+        """Add a duration of stage for mfg."""
+        with self._lock:
+            key = (stage, mfg)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    def count(self, name, mfg, n=1):
+        """Add n to the counter name (one of COUNTERS) of mfg."""
+        with self._lock:
+            counter = self.counters[name]
+            counter[mfg] = counter.get(mfg, 0) + n
+
+    def report(self):
+        """Return the run report as JSON serializable dict."""
+        with self._lock:
+            stages = {}
+            for (stage, mfg), hist in sorted(self.histograms.items()):
+                stages.setdefault(stage, {})[mfg] = hist.to_dict()
+            return {
+                'started': self.started,
+                'duration': round(time.perf_counter() - self._start, 6),
+                'stages': stages,
+                **{name: dict(sorted(c.items()))
+                   for name, c in self.counters.items()},
+            }
+
+    def prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        report = self.report()
+        lines = self._histogram_lines()
+        for counter, help_text in COUNTERS.items():
+            name = f'{PREFIX}_{counter}_total'
+            lines += [f'# HELP {name} {help_text}',
+                      f'# TYPE {name} counter']
+            lines += [f'{name}{{mfg="{mfg}"}} {n}'
+                      for mfg, n in report[counter].items()]
+        for gauge, value, help_text in [
+                ('run_duration_seconds', report['duration'],
+                 'Duration of the last run'),
+                ('run_start_timestamp_seconds', report['started'],
+                 'Start of the last run')]:
+            name = f'{PREFIX}_{gauge}'
+            lines += [f'# HELP {name} {help_text}',
+                      f'# TYPE {name} gauge',
+                      f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+    def _histogram_lines(self):
+        """Return the Prometheus lines of the stage histograms."""
+        name = f'{PREFIX}_stage_seconds'
+        lines = [f'# HELP {name} Time spent per scrape stage',
+                 f'# TYPE {name} histogram']
+        with self._lock:
+            for (stage, mfg), hist in sorted(self.histograms.items()):
+                labels = f'mfg="{mfg}",stage="{stage}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS, hist.counts):
+                    cumulative += n
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} '
+                                 f'{cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {hist.sum:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {hist.count}')
+        return lines
+
+    def write_json(self, path):
+        """Write the run report to path."""
+        write_atomic(path, json.dumps(self.report(), indent=1) + '\n')
+
+    def write_prometheus(self, path):
+        """Write a textfile for the node_exporter textfile collector."""
+        write_atomic(path, self.prometheus())
+
+
+class NullMetrics:
+    """Disabled metrics, every call is a no-op."""
+
+    class _NullTimer:
+        __slots__ = ()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    _timer = _NullTimer()
+
+    def timer(self, stage, mfg):  # pylint: disable=unused-argument
+        return self._timer
+
+    def observe(self, stage, mfg, seconds):
+        pass
+
+    def count(self, name, mfg, n=1):
+        pass
+
+    def merge(self, other):
+        pass
+
+
+#: Shared disabled metrics
+NULL_METRICS = NullMetrics()
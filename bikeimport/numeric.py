@@ -0,0 +1,143 @@
+"""Vectorized conversion of scraped geometry cells to numbers."""
+import numpy as np
+import pandas as pd
+
+#: Factors to convert length units to millimetres
+UNIT_FACTORS = {
+    'mm': 1.0,
+    'cm': 10.0,
+    'in': 25.4,
+    'inch': 25.4,
+    '"': 25.4,
+}
+
+#: Cell contents meaning 'no value'
+MISSING_VALUES = ['', '-', '–', '—', 'n/a', 'na', 'nan', 'none']
+
+# separator of joined cells, scraped cells never contain it
+_SEP = '\x1f'
+_NUMBER = r'[-+]?\d+(?:\.\d+)?'
+#: number or range 'lo-hi', optional unit and footnote, blanks removed
+CELL_PATTERN = (
+    rf'^(?P<lo>{_NUMBER})'
+    rf'(?:(?:-|–|to|/)(?P<hi>{_NUMBER}))?'
+    r'(?P<unit>mm|cm|inch|in|")?'
+    r'(?:\*+|[¹²³⁴⁵]+|\(\d+\)|\[\d+\])?$'
+)
+
+
+class NumericParseError(ValueError):
+    """Raised with all cells that could not be converted to numbers."""
+
+    def __init__(self, failures):
+        """Create error for failures (DataFrame with row, column, value)."""
+        self.failures = failures
+        cells = ', '.join(f"{r.row}/{r.column}={r.value!r}"
+                          for r in failures.head(10).itertuples())
+        more = len(failures) - 10
+        super().__init__(
+            f"{len(failures)} cells not numeric: {cells}"
+            + (f" and {more} more" if more > 0 else ''))
+
+
+def to_numeric_column(column):
+    """Convert one column of scraped cells to float.
+
+    Handles decimal commas, degree signs, unit suffixes (mm, cm, in),
+    ranges (mean of both ends) and footnote markers.
+
+    Parameters:
+    -----------
+    column (pandas.Series): cells as scraped
+
+    Returns:
+    --------
+    (pandas.Series of float, numpy.ndarray of bool): values and mask of
+    cells that could not be parsed
+    """
+    failed = np.zeros(len(column), dtype=bool)
+    # numbers already converted by pandas (e.g. read_csv) need no parsing
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype(float), failed
+
+    # Decimal commas, degree signs and blanks are removed from all cells
+    # at once in one joined string with C level str.replace
+    blob = _SEP.join(column.astype(str).to_numpy())
+    cells = blob.replace(',', '.').replace('°', '').replace(' ', '').split(_SEP)
+    try:
+        values = np.array(cells, dtype=float)
+        return pd.Series(values, index=column.index, name=column.name), failed
+    except ValueError:
+        pass
+
+    # Units, ranges, footnotes and garbage are rare, only these cells are
+    # matched with the regular expression
+    cells = pd.Series(cells)
+    values = pd.to_numeric(cells, errors='coerce').to_numpy(dtype=float)
+    slow = np.flatnonzero(np.isnan(values) & column.notna().to_numpy())
+    if slow.size:
+        text = cells.iloc[slow]
+        missing = text.str.lower().isin(MISSING_VALUES).to_numpy()
+        parts = text.str.extract(CELL_PATTERN)
+
+        lo = parts['lo'].astype(float).to_numpy()
+        hi = parts['hi'].astype(float).to_numpy()
+        parsed = np.where(np.isnan(hi), lo, (lo + hi) / 2)
+        parsed *= parts['unit'].map(UNIT_FACTORS).fillna(1.0).to_numpy()
+        values[slow] = parsed
+        failed[slow] = np.isnan(lo) & ~missing
+    return pd.Series(values, index=column.index, name=column.name), failed
+
+
+def to_numeric_frame(df, columns):
+    """Convert columns of df to float, other columns are not touched.
+
+    Parameters:
+    -----------
+    df (pandas.DataFrame): scraped data
+    columns (list of str): columns to convert
+
+    Returns:
+    --------
+    (pandas.DataFrame, pandas.DataFrame): converted copy of df and all
+    failed cells with columns 'row', 'column', 'value'
+    """
+    df = df.copy()
+    failures = []
+    for col in columns:
+        values, failed = to_numeric_column(df[col])
+        if failed.any():
+            failures.append(pd.DataFrame({
+                'row': df.index[failed],
+                'column': col,
+                'value': df[col].to_numpy()[failed],
+            }))
+        df[col] = values.to_numpy()
+    if failures:
+        failures = pd.concat(failures, ignore_index=True)
+    else:
+        failures = pd.DataFrame(columns=['row', 'column', 'value'])
+    return df, failures
+
+
+def whole_numbers_as_int(df):
+    """Return df with float columns of whole numbers as nullable Int64.
+
+    Dimensions are float after to_numeric_frame(), written to csv as is
+    560 becomes '560.0'. Converted columns are written as '560', missing
+    values stay empty, columns with fractions are not changed.
+    """
+    whole = {}
+    for col in df.columns:
+        if not pd.api.types.is_float_dtype(df[col]):
+            continue
+        values = df[col].to_numpy()
+        values = values[~np.isnan(values)]
+        if np.isfinite(values).all() and (values == np.round(values)).all():
+            whole[col] = df[col].astype('Int64')
+    if not whole:
+        return df
+    df = df.copy()
+    for col, values in whole.items():
+        df[col] = values
+    return df
@@ -1,4 +1,6 @@
 """Reformat bike geometry data of CSV files copied from Ridley website tables."""
+import io
+import os
 import pandas as pd
 from .dataimporter import DataImporter
 
@@ -44,7 +46,18 @@ class RidleyImporter(DataImporter):
         # Return dataframe without index
         return df.reset_index()
 
-    def scrape(self, url):
-        """Retrieve and parse data from csv_file."""
-        df = pd.read_csv(url, sep="\t")
+    def fetch(self, url):
+        """Read the csv file given by path or url."""
+        if os.path.exists(url):
+            with open(url, 'rb') as f:
+                return f.read()
+        return super().fetch(url)
+
+    def extract_table(self, content, url=None):
+        """Return the text of the csv file."""
+        return content.decode('utf-8')
+
+    def parse_table(self, table):
+        """Parse data from the text of the csv file."""
+        df = pd.read_csv(io.StringIO(table), sep="\t")
         return df
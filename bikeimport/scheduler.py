@@ -0,0 +1,94 @@
+"""Schedule scrape jobs concurrently across hosts with per-host politeness."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+def host_of(url):
+    """Return the host part of url, local files map to an empty host."""
+    return urlparse(str(url)).netloc.lower()
+
+
+# wait() is the whole interface, the limiter only keeps the time slots
+class HostRateLimiter:  # pylint: disable=too-few-public-methods
+    """Enforce a minimum delay between two requests to the same host.
+
+    Requests to different hosts are not delayed against each other.
+    The limiter is thread safe, callers reserve a time slot for a host and
+    sleep until it is due.
+    """
+
+    def __init__(self, delay=1.0):
+        """Create a limiter.
+
+        Parameters:
+        -----------
+        delay (float): seconds between two requests to the same host
+        """
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        """Block until the next request to the host of url is allowed."""
+        if self.delay <= 0:
+            return
+        host = host_of(url)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def map_by_host(func, records, workers=1, delay=1.0, progress=None):
+    """Apply func to every record, fetching different hosts concurrently.
+
+    Records are grouped by the host of record['url']. Each host is worked
+    on by at most one thread, so a host never sees more than one request
+    every delay seconds. Different hosts are processed in parallel by up to
+    workers threads.
+
+    Parameters:
+    -----------
+    func (callable): called as func(record), result is collected
+    records (list of dict): jobs in input order
+    workers (int): number of threads, 1 keeps the input order for fetching
+    delay (float): seconds between two requests to the same host
+    progress (callable): optional progress(record) called after each job,
+        never by two threads at the same time
+
+    Returns:
+    --------
+    list: results of func in the order of records (deterministic)
+    """
+    limiter = HostRateLimiter(delay)
+    progress_lock = threading.Lock()
+    results = [None] * len(records)
+
+    hosts = {}
+    for i, record in enumerate(records):
+        hosts.setdefault(host_of(record['url']), []).append(i)
+
+    def work_host(indexes):
+        for i in indexes:
+            limiter.wait(records[i]['url'])
+            results[i] = func(records[i])
+            if progress:
+                # progress() counts and prints, one job at a time
+                with progress_lock:
+                    progress(records[i])
+
+    if workers <= 1:
+        work_host(range(len(records)))
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(work_host, indexes)
+                   for indexes in hosts.values()]
+        for future in futures:
+            # re-raise first importer error like the sequential loop
+            future.result()
+    return results
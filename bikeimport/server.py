@@ -0,0 +1,414 @@
+"""Serve lookups and comparisons of the geometry database over HTTP.
+
+The database is loaded once and kept in memory as typed frame. Responses
+are cached in a LRU cache, the database files are checked for changes at
+most every check_interval seconds, a changed database is reloaded in a
+thread while the old one is still served and the cache is cleared.
+
+Endpoints (GET, JSON responses):
+  /lookup?mfg=giant&model=tcr[&year=2023][&size=M]
+  /compare?frame=giant/tcr/2023/M&frame=bmc/slr01/2023/54
+  /list?mfg=giant&category=race&stack_min=550&stack_max=580[&limit=100]
+  /similar?mfg=giant&model=tcr&year=2023&size=M[&k=10]
+  /fit?stack=560&reach=385[&stack_tol=10&reach_tol=5&category=race
+       &year=2023&spacers=0&stem=0&k=20]
+  /status
+"""
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict
+from urllib.parse import (parse_qsl, urlsplit,)
+
+import pandas as pd
+
+from .dataimporter import DataImporter
+from .fit import (FitIndex, FitTarget,)
+from .globals import normalize
+from .similarity import (FrameNotFoundError, GeometryIndex,)
+from .storage import (INDEX_KEYS, filter_frame, open_store,)
+
+#: Reason phrases of the status codes the server sends
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+#: Index levels with integer values
+_INT_KEYS = [DataImporter.YEAR_KEY]
+
+
+class LRUCache:
+    """Least recently used cache of a bounded number of entries."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached value or None."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Cache value, the least recently used entry is dropped if full."""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries."""
+        self._entries.clear()
+
+
+def to_json(df):
+    """Return the rows of df as JSON array of objects, NaN as null."""
+    return df.reset_index().to_json(orient='records', double_precision=4)
+
+
+def _int(params, name, default=None):
+    value = params.get(name)
+    if value is None:
+        if default is None:
+            raise ValueError(f"parameter {name} is required")
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"parameter {name} must be an integer") from None
+
+
+def _float(params, name, default=None):
+    value = params.get(name)
+    if value is None:
+        if default is None:
+            raise ValueError(f"parameter {name} is required")
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"parameter {name} must be a number") from None
+
+
+class LoadedDatabase:
+    """One version of the database in memory and its query indexes.
+
+    Indexes are built on first use, a reloaded database starts without.
+    """
+
+    def __init__(self, db, version):
+        """Keep db, read from the store at version."""
+        if db.empty:
+            db = pd.DataFrame(index=pd.MultiIndex.from_tuples(
+                [], names=INDEX_KEYS))
+        # sorted keys allow binary search for lookups
+        self.db = db.sort_index()
+        self.version = version
+        self.loaded = time.time()
+        self._indexes = {}
+
+    def rows(self, key):
+        """Return the rows whose index starts with key."""
+        try:
+            locs = self.db.index.get_locs(list(key))
+        except (KeyError, TypeError):
+            locs = []
+        if len(locs) == 0:
+            raise FrameNotFoundError(f"No frame {'/'.join(map(str, key))}")
+        return self.db.iloc[locs]
+
+    def index(self, cls):
+        """Return cls(db), e.g. a GeometryIndex, built on first use."""
+        if cls not in self._indexes:
+            self._indexes[cls] = cls(self.db)
+        return self._indexes[cls]
+
+
+class GeometryService:
+    """The database in memory and the queries answered from it."""
+
+    def __init__(self, database, fmt='csv', cache_size=1024,
+                 check_interval=1.0):
+        """Load the database.
+
+        Parameters:
+        -----------
+        database (str): database path
+        fmt (str): database format, 'csv' or 'parquet'
+        cache_size (int): number of cached responses
+        check_interval (float): seconds between checks for changes
+        """
+        self.store = open_store(database, fmt)
+        self.cache = LRUCache(cache_size)
+        self.check_interval = check_interval
+        self._checked = time.monotonic()
+        self._reload = None
+        self.routes = {
+            '/lookup': self.lookup,
+            '/compare': self.compare,
+            '/list': self.list,
+            '/similar': self.similar,
+            '/fit': self.fit,
+        }
+        version = self.store.version()
+        self.current = None
+        self._use(self.store.read(typed=True), version)
+
+    @property
+    def db(self):
+        """The loaded database frame."""
+        return self.current.db
+
+    def _use(self, db, version):
+        self.current = LoadedDatabase(db, version)
+        self.cache.clear()
+
+    def check(self):
+        """Reload the database in a thread if its files changed."""
+        now = time.monotonic()
+        if self._reload or now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        version = self.store.version()
+        if version != self.current.version:
+            self._reload = asyncio.ensure_future(self._reload_from(version))
+
+    async def _reload_from(self, version):
+        loop = asyncio.get_running_loop()
+        try:
+            db = await loop.run_in_executor(None, lambda: self.store.read(
+                typed=True))
+            self._use(db, version)
+        except Exception as e:  # pylint: disable=broad-except
+            # keep serving the loaded database, retry on the next check
+            print(f"reloading failed: {type(e).__name__}: {e}",
+                  file=sys.stderr)
+        finally:
+            self._reload = None
+
+    def _key(self, mfg, model, year=None, size=None):
+        key = [normalize(mfg), normalize(model)]
+        if year is not None:
+            key.append(int(year))
+            if size is not None:
+                key.append(str(size))
+        return key
+
+    def lookup(self, params):
+        """Rows of a model, optionally of one year and size."""
+        if 'mfg' not in params or 'model' not in params:
+            raise ValueError("parameters mfg and model are required")
+        year = _int(params, 'year', 0) or None
+        key = self._key(params['mfg'], params['model'], year,
+                        params.get('size') if year else None)
+        return to_json(self.current.rows(key))
+
+    def compare(self, frames):
+        """Dimensions of frames side by side, frame=mfg/model/year/size."""
+        if len(frames) < 2:
+            raise ValueError("compare needs at least two frame parameters")
+        columns = {}
+        for frame in frames:
+            parts = frame.split('/')
+            if len(parts) != 4:
+                raise ValueError(f"frame {frame} is not mfg/model/year/size")
+            row = self.current.rows(self._key(*parts)).iloc[0]
+            columns[frame] = row
+        side_by_side = pd.DataFrame(columns)
+        # rows mix text and numbers, NaN of object columns can not be encoded
+        side_by_side = side_by_side.where(side_by_side.notna(), None)
+        return side_by_side.to_json(orient='index', double_precision=4)
+
+    def list(self, params):
+        """Rows matching col=value, col_min=value and col_max=value."""
+        filters = []
+        limit = _int(params, 'limit', 100)
+        offset = _int(params, 'offset', 0) if 'offset' in params else 0
+        for name, value in params.items():
+            if name in ('limit', 'offset'):
+                continue
+            col, op = name, '=='
+            if name.endswith('_min') or name.endswith('_max'):
+                col, op = name[:-4], '>=' if name.endswith('_min') else '<='
+            if col not in self.db.index.names and col not in self.db:
+                raise ValueError(f"unknown column {col}")
+            numeric = col in _INT_KEYS or (
+                col in self.db and self.db[col].dtype.kind == 'f')
+            if op != '==' and not numeric:
+                raise ValueError(f"{name}: {col} is not numeric")
+            if numeric:
+                value = float(value)
+            elif col in INDEX_KEYS[:2] or col == DataImporter.CAT_KEY:
+                value = normalize(value)
+            filters.append((col, op, value))
+        rows = filter_frame(self.db, filters)
+        page = rows.iloc[offset:offset + limit]
+        return f'{{"count": {len(rows.index)}, "rows": {to_json(page)}}}'
+
+    def similar(self, params):
+        """Frames with the most similar geometry."""
+        for name in ('mfg', 'model', 'size'):
+            if name not in params:
+                raise ValueError(f"parameter {name} is required")
+        result = self.current.index(GeometryIndex).similar(
+            params['mfg'], params['model'], _int(params, 'year'),
+            params['size'], k=_int(params, 'k', 10))
+        return to_json(result)
+
+    def fit(self, params):
+        """Frames matching a target stack and reach."""
+        target = FitTarget(
+            _float(params, 'stack'), _float(params, 'reach'),
+            stack_tol=_float(params, 'stack_tol', 10.0),
+            reach_tol=_float(params, 'reach_tol', 5.0),
+            spacers=_float(params, 'spacers', 0.0),
+            stem=_float(params, 'stem', 0.0))
+        result = self.current.index(FitIndex).query(
+            target, category=params.get('category'),
+            year=_int(params, 'year', 0) or None)
+        return to_json(result.head(_int(params, 'k', 20)))
+
+    def status(self):
+        """Database and cache statistics, never cached."""
+        return json.dumps({
+            'rows': len(self.db.index),
+            'loaded': self.current.loaded,
+            'cached': len(self.cache),
+            'hits': self.cache.hits,
+            'misses': self.cache.misses,
+        })
+
+    def respond(self, target):
+        """Return (status, body) for the request target (path and query)."""
+        self.check()
+        url = urlsplit(target)
+        if url.path == '/status':
+            return 200, self.status().encode('utf-8')
+        key = (url.path, url.query)
+        body = self.cache.get(key)
+        if body is not None:
+            return 200, body
+        handler = self.routes.get(url.path)
+        if handler is None:
+            return 404, _error(f"unknown path {url.path}")
+        pairs = parse_qsl(url.query)
+        try:
+            if url.path == '/compare':
+                # the only endpoint with a repeated parameter
+                text = handler([v for k, v in pairs if k == 'frame'])
+            else:
+                text = handler(dict(pairs))
+        except FrameNotFoundError as e:
+            return 404, _error(e.args[0])
+        except ValueError as e:
+            return 400, _error(str(e))
+        body = text.encode('utf-8')
+        self.cache.put(key, body)
+        return 200, body
+
+    async def handle(self, reader, writer):
+        """Answer HTTP/1.1 requests of one connection (keep-alive)."""
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except ValueError as e:
+                    await _send(writer, 400, _error(str(e)), False)
+                    break
+                if request is None:
+                    break
+                method, target, keep_alive = request
+
+                if method not in ('GET', 'HEAD'):
+                    status, body = 405, _error(f"{method} not allowed")
+                else:
+                    try:
+                        status, body = self.respond(target)
+                    except Exception as e:  # pylint: disable=broad-except
+                        status, body = 500, _error(
+                            f"{type(e).__name__}: {e}")
+                await _send(writer, status, body, keep_alive,
+                            head=method == 'HEAD')
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _read_request(reader):
+    """Read the request line and headers of the next request.
+
+    A request body is read and ignored.
+
+    Returns:
+    --------
+    (str, str, bool): method, target and keep-alive of the request, None
+    if the client closed the connection
+
+    Raises:
+    -------
+    ValueError if the request is malformed
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise ValueError("bad request line") from None
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = header.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise ValueError("bad content-length") from None
+    if length:
+        await reader.readexactly(length)
+    if version == 'HTTP/1.1':
+        keep_alive = headers.get('connection') != 'close'
+    else:
+        keep_alive = headers.get('connection') == 'keep-alive'
+    return method, target, keep_alive
+
+
+def _error(message):
+    return json.dumps({'error': message}).encode('utf-8')
+
+
+async def _send(writer, status, body, keep_alive, head=False):
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        f"\r\n".encode('latin-1'))
+    if not head:
+        writer.write(body)
+    await writer.drain()
+
+
+async def serve(service, host='127.0.0.1', port=8000):
+    """Serve service until cancelled."""
+    server = await asyncio.start_server(service.handle, host, port)
+    async with server:
+        await server.serve_forever()
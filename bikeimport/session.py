@@ -0,0 +1,87 @@
+"""Registry of pooled keep-alive HTTP sessions shared by all importers."""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .globals import get_header
+from .scheduler import host_of
+
+_lock = threading.Lock()
+_sessions = {}
+_injected = None
+_config = {
+    'pool_size': 4,
+    'retries': 3,
+    'backoff': 0.5,
+}
+
+
+def configure(pool_size=None, retries=None, backoff=None):
+    """Configure sessions created from now on.
+
+    Parameters:
+    -----------
+    pool_size (int): connections kept alive per host
+    retries (int): retries on connection errors and 429/5xx responses
+    backoff (float): backoff factor between retries in seconds
+    """
+    with _lock:
+        if pool_size is not None:
+            _config['pool_size'] = pool_size
+        if retries is not None:
+            _config['retries'] = retries
+        if backoff is not None:
+            _config['backoff'] = backoff
+
+
+def set_session(session):
+    """Use session for all hosts, e.g. a recording stub in tests.
+
+    Parameters:
+    -----------
+    session: object with a requests compatible get() method,
+             None returns to the pooled per-host sessions
+    """
+    global _injected  # pylint: disable=global-statement
+    with _lock:
+        _injected = session
+
+
+def _new_session():
+    session = requests.Session()
+    session.headers.update(get_header())
+    retry = Retry(total=_config['retries'],
+                  backoff_factor=_config['backoff'],
+                  status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=['GET', 'HEAD'])
+    adapter = HTTPAdapter(pool_connections=1,
+                          pool_maxsize=_config['pool_size'],
+                          max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(url):
+    """Return the shared session for the host of url.
+
+    Sessions keep connections alive, so consecutive pages of the same
+    manufacturer skip the TCP and TLS handshake.
+    """
+    with _lock:
+        if _injected is not None:
+            return _injected
+        host = host_of(url)
+        if host not in _sessions:
+            _sessions[host] = _new_session()
+        return _sessions[host]
+
+
+def close_sessions():
+    """Close all pooled sessions and their connections."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
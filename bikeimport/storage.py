@@ -0,0 +1,613 @@
+"""Append-only storage for the geometry database."""
+import glob
+import operator
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .atomic import atomic_path
+from .dataimporter import DataImporter
+from .globals import (CONFLICT_POLICIES, DB_FORMATS,)
+from .numeric import whole_numbers_as_int
+
+#: Index columns of the geometry database
+INDEX_KEYS = [DataImporter.MFG_KEY,
+              DataImporter.MODEL_KEY,
+              DataImporter.YEAR_KEY,
+              DataImporter.MFG_FRAME_KEY]
+
+#: Columns of standardized data besides the index
+DATA_COLUMNS = [DataImporter.CAT_KEY, *DataImporter.std_column_map.values()]
+
+#: Storage formats for open_store()
+FORMATS = DB_FORMATS
+
+#: dtypes of the typed database frame, see compact_frame()
+TYPED_DTYPES = {
+    DataImporter.MFG_KEY: 'category',
+    DataImporter.MODEL_KEY: 'category',
+    DataImporter.YEAR_KEY: 'int16',
+    DataImporter.MFG_FRAME_KEY: 'category',
+    DataImporter.CAT_KEY: 'category',
+    **{col: 'float32' for col in DATA_COLUMNS[1:]},
+}
+
+_OPERATORS = {
+    '==': operator.eq,
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+class KeyConflictError(ValueError):
+    """Rows to append have keys that are already stored."""
+
+    def __init__(self, keys):
+        #: pandas.MultiIndex of the conflicting keys
+        self.keys = keys
+        sample = ', '.join('/'.join(map(str, k)) for k in keys[:5])
+        more = f" and {len(keys) - 5} more" if len(keys) > 5 else ""
+        super().__init__(f"{len(keys)} rows already stored: {sample}{more}")
+
+
+def _typed_columns(flat):
+    """Convert the columns of flat (index reset) to TYPED_DTYPES in place."""
+    for col, dtype in TYPED_DTYPES.items():
+        if col not in flat:
+            continue
+        if col == DataImporter.MFG_FRAME_KEY:
+            # sizes are strings, also when only numbers were read
+            if not (isinstance(flat[col].dtype, pd.CategoricalDtype) and
+                    flat[col].cat.categories.inferred_type == 'string'):
+                flat[col] = flat[col].astype(str)
+        if flat[col].dtype != dtype:
+            flat[col] = flat[col].astype(dtype)
+    return flat
+
+
+def _concat_typed(frames):
+    """Concatenate typed frames, categorical columns stay categorical."""
+    if len(frames) > 1:
+        for col, dtype in TYPED_DTYPES.items():
+            having = [f for f in frames if col in f]
+            if dtype != 'category' or not having:
+                continue
+            categories = union_categoricals(
+                [f[col] for f in having]).categories
+            for f in frames:
+                if col in f:
+                    f[col] = f[col].cat.set_categories(categories)
+                else:
+                    # e.g. no category in files of import_bikes.py
+                    f[col] = pd.Categorical([None] * len(f.index),
+                                            categories=categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def compact_frame(df):
+    """Return the database df with TYPED_DTYPES.
+
+    Keys and category are categorical and dimensions float32 (0.1 mm and
+    0.01 degree are exact enough), the MultiIndex levels hold the
+    categories only once. Sizes are strings. The year is parsed as int16
+    but the index level is int64, pandas 1.x indexes have no smaller
+    integers. Each year is stored once in the level, rows only hold its
+    int8 code.
+    """
+    return _typed_columns(df.reset_index()).set_index(INDEX_KEYS)
+
+
+def key_hashes(index):
+    """Return a uint64 hash per row of a database index.
+
+    Key values are hashed as strings, so sizes read back as numbers from one
+    file and as text from another still match. Only the distinct values of
+    every level are hashed, rows combine the hashes of their level codes.
+    """
+    if not isinstance(index, pd.MultiIndex):
+        index = pd.MultiIndex.from_arrays([index])
+    hashes = np.zeros(len(index), dtype=np.uint64)
+    for level, codes in zip(index.levels, index.codes):
+        level_hashes = pd.util.hash_array(
+            level.astype(str).to_numpy(dtype=object), categorize=False)
+        values = np.where(codes >= 0, level_hashes[codes], np.uint64(0))
+        hashes = hashes * np.uint64(1000003) ^ values
+    return hashes
+
+
+def drop_duplicate_keys(df):
+    """Return df with only the last row of every key."""
+    duplicated = pd.Index(key_hashes(df.index)).duplicated(keep='last')
+    if not duplicated.any():
+        return df
+    return df[~duplicated]
+
+
+def _check_policy(on_conflict):
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"on_conflict must be one of {CONFLICT_POLICIES}")
+
+
+def _conflicts(df, stored_hashes, on_conflict):
+    """Return df without rows that must not be appended.
+
+    Raises:
+    -------
+    KeyConflictError with on_conflict 'error' if a key is already stored
+    """
+    if on_conflict == 'replace':
+        return df
+    stored = np.isin(key_hashes(df.index), stored_hashes)
+    if on_conflict == 'error' and stored.any():
+        raise KeyConflictError(df.index[stored])
+    return df[~stored]
+
+
+def filter_frame(df, filters):
+    """Return rows of df matching all filters.
+
+    Parameters:
+    -----------
+    df (pandas.DataFrame): database indexed by INDEX_KEYS
+    filters (list of tuple): (column, op, value) with op one of
+        '==', '!=', '<', '<=', '>', '>=', 'in', 'not in',
+        e.g. [('year', '==', 2023), ('stack', '>=', 560)]
+
+    Returns:
+    --------
+    pandas.DataFrame
+    """
+    if not filters or df.empty:
+        return df
+    mask = np.ones(len(df.index), dtype=bool)
+    for col, op, value in filters:
+        # index levels are compared without copying the frame
+        if col in df.index.names:
+            values = pd.Series(df.index.get_level_values(col))
+        else:
+            values = df[col]
+        if op == 'in':
+            mask &= values.isin(value).to_numpy()
+        elif op == 'not in':
+            mask &= ~values.isin(value).to_numpy()
+        else:
+            mask &= _OPERATORS[op](values, value).to_numpy()
+    return df[mask]
+
+
+class SegmentStore:
+    """Geometry database as one base CSV file plus appended segments.
+
+    New data is written as a new segment file in '<path>.d/' without
+    reading the existing database. Once compact_every segments exist they
+    are merged into the base file <path>.
+
+    Rows are keyed by INDEX_KEYS, a later row replaces earlier rows with the
+    same key. Replaced rows are dropped when reading and compacting.
+    """
+
+    def __init__(self, path, compact_every=16):
+        """Open the database at path.
+
+        Parameters:
+        -----------
+        path (str): base CSV file, e.g. database.csv
+        compact_every (int): merge segments into the base file when this
+                             many segments exist, 0 never compacts
+        """
+        self.path = path
+        self.segment_dir = path + '.d'
+        self.compact_every = compact_every
+
+    def segments(self):
+        """Return segment files in the order they were written."""
+        return sorted(glob.glob(os.path.join(self.segment_dir, '*.csv')))
+
+    def exists(self):
+        """Return True if the database contains any data."""
+        return os.path.exists(self.path) or bool(self.segments())
+
+    def _write_csv(self, df, path):
+        with atomic_path(path) as tmp:
+            whole_numbers_as_int(df).to_csv(tmp, mode='x')
+
+    def _files(self):
+        files = self.segments()
+        if os.path.exists(self.path):
+            files.insert(0, self.path)
+        return files
+
+    def version(self):
+        """Return a token that changes whenever the stored data changes."""
+        return _version(self._files())
+
+    def stored_keys(self):
+        """Return key_hashes() of all stored rows, only keys are read."""
+        hashes = [key_hashes(pd.read_csv(f, usecols=INDEX_KEYS, dtype=str)
+                             .set_index(INDEX_KEYS).index)
+                  for f in self._files()]
+        return np.concatenate(hashes) if hashes else np.array([], np.uint64)
+
+    def append(self, df, on_conflict='replace'):
+        """Append df to the database.
+
+        Parameters:
+        -----------
+        df (pandas.DataFrame): standardized data indexed by INDEX_KEYS
+        on_conflict (str): rows with a key that is already stored
+            'replace' - replace the stored rows, existing data is not loaded
+            'keep' - keep the stored rows, the new rows are dropped
+            'error' - raise KeyConflictError, nothing is written
+
+        Raises:
+        -------
+        KeyConflictError
+        """
+        _check_policy(on_conflict)
+        if df.empty:
+            return
+        df = drop_duplicate_keys(df)
+        if on_conflict != 'replace' and self.exists():
+            df = _conflicts(df, self.stored_keys(), on_conflict)
+            if df.empty:
+                return
+        if not self.exists():
+            self._write_csv(df, self.path)
+            return
+        os.makedirs(self.segment_dir, exist_ok=True)
+        name = f"{time.time_ns():020d}-{os.getpid()}.csv"
+        self._write_csv(df, os.path.join(self.segment_dir, name))
+        if self.compact_every and len(self.segments()) >= self.compact_every:
+            self.compact()
+
+    def read(self, filters=None, typed=False):
+        """Return the database as one DataFrame.
+
+        Parameters:
+        -----------
+        filters (list of tuple): optional row filters, see filter_frame()
+        typed (bool): return the compact frame with TYPED_DTYPES
+        """
+        files = self._files()
+        if not files:
+            return pd.DataFrame()
+        if typed:
+            # parse directly into the compact dtypes
+            df = _concat_typed([_typed_columns(
+                pd.read_csv(f, header=0, dtype=TYPED_DTYPES))
+                for f in files]).set_index(INDEX_KEYS)
+        else:
+            df = pd.concat([pd.read_csv(f, header=0, index_col=[0, 1, 2, 3])
+                            for f in files])
+        # files are in write order, the last row of a key is current
+        return filter_frame(drop_duplicate_keys(df), filters)
+
+    def compact(self):
+        """Merge all segments into the base file, drop replaced rows."""
+        segments = self.segments()
+        if not segments:
+            return
+        self._write_csv(self.read(), self.path)
+        for segment in segments:
+            os.remove(segment)
+
+
+def _version(files):
+    """Return names, sizes and modification times of files."""
+    version = []
+    for f in files:
+        try:
+            st = os.stat(f)
+        except FileNotFoundError:
+            continue
+        version.append((f, st.st_size, st.st_mtime_ns))
+    return tuple(version)
+
+
+def _pyarrow():
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel
+        import pyarrow.dataset  # pylint: disable=import-outside-toplevel,unused-import
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel,unused-import
+    except ImportError as e:
+        raise ImportError("parquet storage requires pyarrow, "
+                          "install requirements.txt") from e
+    return pyarrow
+
+
+def _expression(filters):
+    """Return filters (see filter_frame()) as pyarrow dataset expression,
+    None without filters."""
+    pa = _pyarrow()
+    expression = None
+    for col, op, value in filters or []:
+        field = pa.dataset.field(col)
+        if op == 'in':
+            term = field.isin(value)
+        elif op == 'not in':
+            term = ~field.isin(value)
+        else:
+            term = _OPERATORS[op](field, value)
+        expression = term if expression is None else expression & term
+    return expression
+
+
+class ParquetStore:
+    """Columnar geometry database, Parquet files partitioned by mfg and year.
+
+    Layout of path: 'mfg=<mfg>/year=<year>/<time>-<id>-0.parquet', file
+    names sort in write order. Reads push filters down to pyarrow,
+    partitions and row groups that cannot match are skipped without being
+    read.
+
+    Rows are keyed by INDEX_KEYS. Appending rows with stored keys rewrites
+    only the partitions of these rows. Files are written to a staging
+    directory and moved into their partition, readers never see partial
+    files. If a run stops between moving the new files in and removing
+    the replaced ones, read() keeps the last row of every key, before
+    filters on other columns than the keys are applied.
+    """
+
+    #: Columns used to partition the data into directories
+    PARTITION_KEYS = [DataImporter.MFG_KEY, DataImporter.YEAR_KEY]
+
+    def __init__(self, path, compact_every=16):
+        """Open the database at path.
+
+        Parameters:
+        -----------
+        path (str): dataset directory, e.g. database.parquet
+        compact_every (int): merge the files of a partition when this many
+                             files exist, 0 never compacts
+        """
+        self.path = path
+        self.compact_every = compact_every
+
+    def schema(self):
+        """Return the pyarrow schema of stored data."""
+        pa = _pyarrow()
+        fields = [(DataImporter.MFG_KEY, pa.string()),
+                  (DataImporter.MODEL_KEY, pa.string()),
+                  (DataImporter.YEAR_KEY, pa.int64()),
+                  (DataImporter.MFG_FRAME_KEY, pa.string()),
+                  (DataImporter.CAT_KEY, pa.string())]
+        fields += [(col, pa.float64()) for col in DATA_COLUMNS[1:]]
+        return pa.schema(fields)
+
+    def _partitioning(self):
+        pa = _pyarrow()
+        schema = self.schema()
+        return pa.dataset.partitioning(
+            pa.schema([schema.field(key) for key in self.PARTITION_KEYS]),
+            flavor='hive')
+
+    def exists(self):
+        """Return True if the database contains any data."""
+        return bool(self.files())
+
+    def version(self):
+        """Return a token that changes whenever the stored data changes."""
+        return _version(self.files())
+
+    def files(self, partition=None):
+        """Return parquet files of the dataset or of one partition dir."""
+        root = partition or self.path
+        return sorted(glob.glob(os.path.join(root, '**', '*.parquet'),
+                                recursive=True))
+
+    def to_table(self, df):
+        """Convert standardized data to a pyarrow table of schema()."""
+        pa = _pyarrow()
+        flat = df.reset_index()
+        flat = flat.reindex(columns=self.schema().names)
+        flat[DataImporter.MFG_FRAME_KEY] = flat[DataImporter.MFG_FRAME_KEY].astype(str)
+        flat[DataImporter.CAT_KEY] = flat[DataImporter.CAT_KEY].astype(object)
+        return pa.Table.from_pandas(flat, schema=self.schema(),
+                                    preserve_index=False)
+
+    def _dataset(self, files=None):
+        pa = _pyarrow()
+        # files in write order, rows of later files are current
+        return pa.dataset.dataset(files or self.files(), format='parquet',
+                                  schema=self.schema(),
+                                  partitioning=self._partitioning(),
+                                  partition_base_dir=self.path)
+
+    def _stored(self, partitions):
+        """Return the stored rows and the files of partitions.
+
+        Parameters:
+        -----------
+        partitions: (mfg, year) pairs
+
+        Returns:
+        --------
+        (pandas.DataFrame, list of str): rows indexed by INDEX_KEYS, paths
+        """
+        pa = _pyarrow()
+        mfg, year = (pa.dataset.field(k) for k in self.PARTITION_KEYS)
+        expression = None
+        for m, y in partitions:
+            term = (mfg == m) & (year == int(y))
+            expression = term if expression is None else expression | term
+        dataset = self._dataset()
+        stored = dataset.to_table(filter=expression).to_pandas()
+        paths = [f.path for f in dataset.get_fragments(filter=expression)]
+        # pyarrow aborts the interpreter if files of a live dataset are
+        # removed, callers remove paths
+        del dataset
+        # rewritten partitions do not carry replaced rows forward
+        return drop_duplicate_keys(stored.set_index(INDEX_KEYS)), paths
+
+    def append(self, df, on_conflict='replace'):
+        """Append df as new files to its partitions.
+
+        Only the partitions (mfg and year) of df are read to find stored
+        keys.
+
+        Parameters:
+        -----------
+        df (pandas.DataFrame): standardized data indexed by INDEX_KEYS
+        on_conflict (str): rows with a key that is already stored
+            'replace' - replace the stored rows, their partitions are
+                        rewritten
+            'keep' - keep the stored rows, the new rows are dropped
+            'error' - raise KeyConflictError, nothing is written
+
+        Raises:
+        -------
+        KeyConflictError
+        """
+        _check_policy(on_conflict)
+        if df.empty:
+            return
+        df = drop_duplicate_keys(df)
+        replaced = []
+        if self.exists():
+            stored, paths = self._stored(df.index.droplevel([1, 3]).unique())
+            df = _conflicts(df, key_hashes(stored.index), on_conflict)
+            if df.empty:
+                return
+            new = np.isin(key_hashes(stored.index), key_hashes(df.index))
+            if new.any():
+                # rewrite the partitions with the new rows
+                replaced = paths
+                df = pd.concat([stored[~new], df])
+        self._write(df)
+        # the new files are in place, a crash now leaves duplicate keys
+        # that read() resolves
+        for path in replaced:
+            os.remove(path)
+        if self.compact_every:
+            for partition in self._partitions():
+                if len(self.files(partition)) >= self.compact_every:
+                    self._compact_partition(partition)
+
+    @staticmethod
+    def _basename():
+        """Return a new file name that sorts after all earlier ones."""
+        return f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+    def _write(self, df):
+        pa = _pyarrow()
+        # hidden, neither files() nor pyarrow datasets list it
+        staging = os.path.join(self.path, f".staging-{uuid.uuid4().hex}")
+        try:
+            pa.dataset.write_dataset(
+                self.to_table(df), staging,
+                format='parquet',
+                partitioning=self._partitioning(),
+                basename_template=f"{self._basename()}-{{i}}.parquet")
+            for f in self.files(staging):
+                target = os.path.join(self.path, os.path.relpath(f, staging))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(f, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _partitions(self):
+        return sorted({os.path.dirname(f) for f in self.files()})
+
+    def _compact_partition(self, partition):
+        pa = _pyarrow()
+        files = self.files(partition)
+        if len(files) < 2:
+            return
+        table = pa.dataset.dataset(files, format='parquet').to_table()
+        # mfg and year are the partition, model and size the rest of the key
+        replaced = table.select([DataImporter.MODEL_KEY,
+                                 DataImporter.MFG_FRAME_KEY]).to_pandas() \
+            .duplicated(keep='last').to_numpy()
+        if replaced.any():
+            table = table.filter(pa.array(~replaced))
+        name = self._basename()
+        tmp = os.path.join(partition, f".{name}.tmp")
+        pa.parquet.write_table(table, tmp)
+        os.replace(tmp, os.path.join(partition, f"{name}-0.parquet"))
+        for f in files:
+            os.remove(f)
+
+    def compact(self):
+        """Merge the files of every partition into one file."""
+        for partition in self._partitions():
+            self._compact_partition(partition)
+
+    def _has_duplicate_keys(self, dataset, expression):
+        """Return True if rows of dataset matching expression share a key.
+
+        Files are written without duplicate keys and compaction drops
+        replaced rows, only partitions with several files are checked.
+        """
+        partitions = {}
+        for fragment in dataset.get_fragments(filter=expression):
+            partitions.setdefault(os.path.dirname(fragment.path),
+                                  []).append(fragment.path)
+        files = sorted(f for paths in partitions.values() if len(paths) > 1
+                       for f in paths)
+        if not files:
+            return False
+        stored = self._dataset(files).to_table(columns=INDEX_KEYS,
+                                               filter=expression)
+        distinct = stored.group_by(INDEX_KEYS).aggregate([])
+        return distinct.num_rows < stored.num_rows
+
+    def read(self, filters=None, typed=False):
+        """Return the database as one DataFrame.
+
+        Parameters:
+        -----------
+        filters (list of tuple): optional row filters pushed down to the
+                                 parquet reader, see filter_frame()
+        typed (bool): return the compact frame with TYPED_DTYPES
+        """
+        if not self.exists():
+            return pd.DataFrame()
+        dataset = self._dataset()
+        # rows replaced by an interrupted append share all key columns with
+        # their replacement, filters on keys select both or neither
+        filters = filters or []
+        keys = [f for f in filters if f[0] in INDEX_KEYS]
+        if self._has_duplicate_keys(dataset, _expression(keys)):
+            # a stale row may match value filters its replacement does
+            # not, keep the last row of every key before filtering values
+            df = dataset.to_table(filter=_expression(keys)).to_pandas()
+            df = filter_frame(drop_duplicate_keys(df.set_index(INDEX_KEYS)),
+                              [f for f in filters if f[0] not in INDEX_KEYS])
+        else:
+            df = dataset.to_table(filter=_expression(filters)).to_pandas()
+            df = df.set_index(INDEX_KEYS)
+        return compact_frame(df) if typed else df
+
+
+def open_store(path, fmt='csv', **kwargs):
+    """Return the store for path in the given format ('csv' or 'parquet').
+
+    kwargs are forwarded to the store.
+    """
+    if fmt == 'parquet':
+        return ParquetStore(path, **kwargs)
+    return SegmentStore(path, **kwargs)
+
+
+def convert(source, dest, source_format='csv', dest_format='parquet'):
+    """Copy the database source into a new database dest.
+
+    Returns:
+    --------
+    int: number of converted rows
+    """
+    df = open_store(source, source_format).read()
+    target = open_store(dest, dest_format, compact_every=0)
+    if target.exists():
+        raise FileExistsError(f"{dest} already contains data")
+    target.append(df)
+    return len(df.index)
@@ -0,0 +1,197 @@
+"""Read only as much of a page as needed to get one element."""
+import codecs
+import re
+from email.message import Message
+from html.parser import HTMLParser
+
+#: Bytes read from the connection at once
+CHUNK_SIZE = 16384
+
+#: Prefix of extracted elements, the element is no complete document and
+#: encoding detection could guess wrong otherwise
+_UTF8_PREFIX = b'<meta charset="utf-8">'
+
+#: charset of <meta charset=...> or of the content of <meta http-equiv=...>
+_META_CHARSET = re.compile(
+    rb'<meta[^>]*?charset\s*=\s*["\']?\s*([-\w.:]+)', re.IGNORECASE)
+
+
+class _Source:
+    """Source text fed to a parser, kept from an absolute offset on.
+
+    Maps parser positions (line, column) to absolute offsets.
+    """
+
+    def __init__(self):
+        self.text = ''
+        #: absolute offset of text[0]
+        self.base = 0
+        self._fed = 0
+        self._line_starts = [0]
+
+    def append(self, data):
+        """Add data fed to the parser."""
+        pos = data.find('\n')
+        while pos >= 0:
+            self._line_starts.append(self._fed + pos + 1)
+            pos = data.find('\n', pos + 1)
+        self._fed += len(data)
+        self.text += data
+
+    def offset(self, pos):
+        """Return the absolute offset of a parser position."""
+        line, column = pos
+        return self._line_starts[line - 1] + column
+
+    def drop_before(self, offset):
+        """Forget the text before offset."""
+        self.text = self.text[offset - self.base:]
+        self.base = offset
+
+    def tag_end(self, offset):
+        """Return the offset after the end of the tag starting at offset."""
+        return self.base + self.text.index('>', offset - self.base) + 1
+
+    def slice(self, start, end):
+        """Return the text between two absolute offsets."""
+        return self.text[start - self.base:end - self.base]
+
+
+class ElementExtractor(HTMLParser):
+    """Incremental parser capturing the source of the first element
+    name with attrs, e.g. ('table', {'id': 'geometrie'}).
+
+    Attributes match like in BeautifulSoup.find(): the value of 'class' has
+    to be one of the classes of the element, other values have to be equal,
+    True only requires the attribute. Text that was parsed before the
+    element started is dropped.
+    """
+
+    def __init__(self, name, attrs=None):
+        super().__init__(convert_charrefs=False)
+        self.name = name.lower()
+        self.attrs = attrs or {}
+        #: absolute offsets of the element source, set when found
+        self.start = None
+        self.end = None
+        self._depth = 0
+        self._source = _Source()
+
+    @property
+    def done(self):
+        """True once the element is complete."""
+        return self.end is not None
+
+    def feed(self, data):
+        self._source.append(data)
+        super().feed(data)
+        if self.start is None:
+            # parsed text before the element is not needed any more
+            self._source.drop_before(self._source.offset(self.getpos()))
+
+    def element(self):
+        """Return the source of the element or None."""
+        if not self.done:
+            return None
+        return self._source.slice(self.start, self.end)
+
+    def _matches(self, attrs):
+        found = dict(attrs)
+        for key, value in self.attrs.items():
+            if key not in found:
+                return False
+            if value is True:
+                continue
+            if key == 'class':
+                if value not in (found[key] or '').split():
+                    return False
+            elif found[key] != value:
+                return False
+        return True
+
+    def handle_starttag(self, tag, attrs):
+        if self.done or tag != self.name:
+            return
+        if self.start is None:
+            if self._matches(attrs):
+                self.start = self._source.offset(self.getpos())
+                self._depth = 1
+        else:
+            self._depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <tag/> opens and closes, it does not change the depth
+        if self.start is None and tag == self.name and self._matches(attrs):
+            self.start = self._source.offset(self.getpos())
+            self.end = self._source.tag_end(self.start)
+
+    def handle_endtag(self, tag):
+        if self.start is None or self.done or tag != self.name:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self.end = self._source.tag_end(self._source.offset(self.getpos()))
+
+
+def charset_of(response, default='utf-8'):
+    """Return the charset declared in the Content-Type header or default."""
+    message = Message()
+    message['Content-Type'] = response.headers.get('Content-Type', '')
+    return message.get_param('charset') or default
+
+
+def sniff_charset(head):
+    """Return the charset of a <meta> tag in the start of a page or None.
+
+    Handles <meta charset="..."> and <meta http-equiv="Content-Type"
+    content="text/html; charset=...">.
+    """
+    match = _META_CHARSET.search(head)
+    return match.group(1).decode('ascii') if match else None
+
+
+def _decoder(charset):
+    """Return an incremental decoder of charset, utf-8 if unknown."""
+    try:
+        return codecs.getincrementaldecoder(charset or 'utf-8')(
+            errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+
+def stream_element(response, name, attrs=None, chunk_size=CHUNK_SIZE):
+    """Read response until the element name with attrs is complete.
+
+    The rest of the page is not downloaded, the caller should close the
+    response afterwards.
+
+    Parameters:
+    -----------
+    response: streamed requests.Response (stream=True)
+    name (str): tag name of the element
+    attrs (dict): attributes of the element, see ElementExtractor
+    chunk_size (int): bytes read at once
+
+    Returns:
+    --------
+    (bytes, int): html of the element, empty if it was not found, and the
+    number of bytes read
+    """
+    charset = charset_of(response, None)
+    decoder = None
+    extractor = ElementExtractor(name, attrs)
+    read = 0
+    for chunk in response.iter_content(chunk_size):
+        if decoder is None:
+            # without charset in the header the page declares it in a
+            # <meta> tag, parsers of complete pages look there, too
+            decoder = _decoder(charset or sniff_charset(chunk))
+        read += len(chunk)
+        extractor.feed(decoder.decode(chunk))
+        if extractor.done:
+            break
+    else:
+        if decoder is not None:
+            extractor.feed(decoder.decode(b'', final=True))
+    element = extractor.element() or ''
+    return _UTF8_PREFIX + element.encode('utf-8'), read
@@ -0,0 +1,266 @@
+"""Declarative geometry tables extracted with compiled XPath plans.
+
+A TableSpec describes where the frame sizes, the rows, the row labels and
+the values of a geometry table are. It is compiled once into XPath
+expressions evaluated by lxml, so the page is walked by libxml2 and not by
+nested find()/findAll() loops in Python. The tree may be built by any of
+the parser backends 'lxml', 'html5lib' and 'html.parser'.
+
+Every spec produces the same raw frame, frame sizes as index and row labels
+as columns, so standardizing is the same for all SpecImporters.
+"""
+import lxml.html
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+from .dataimporter import DataImporter
+
+
+#: Parser backends building the tree the spec is evaluated on
+PARSERS = ['lxml', 'html.parser', 'html5lib']
+
+_STRING = etree.XPath('string()')
+
+
+def has_class(name):
+    """Return an XPath predicate matching elements with the class name.
+
+    Like class matching of BeautifulSoup and CSS, the element may have
+    other classes, e.g. f'td[{has_class("value")}]'.
+    """
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+def element_xpath(name, attrs=None):
+    """Return the XPath of the elements name with attrs anywhere in a page.
+
+    Attributes match like in BeautifulSoup.find() and the streaming
+    ElementExtractor: 'class' has to be one of the classes of the element,
+    True only requires the attribute, other values have to be equal.
+    """
+    predicates = []
+    for key, value in (attrs or {}).items():
+        if value is True:
+            predicates.append(f'@{key}')
+        elif key == 'class':
+            predicates.append(has_class(value))
+        else:
+            predicates.append(f'@{key}="{value}"')
+    return f'//{name}' + ''.join(f'[{p}]' for p in predicates)
+
+
+def parse_document(content, parser='lxml', element=None):
+    """Return the root element of an html page, None for an empty page.
+
+    Parameters:
+    -----------
+    content (bytes): html page
+    parser (str): backend building the tree, one of PARSERS
+    element (tuple): optional (name, attrs) of the only element needed,
+        html.parser builds that subtree only
+    """
+    # the other backends are only imported when they are used
+    # pylint: disable=import-outside-toplevel
+    if parser == 'lxml':
+        try:
+            return lxml.html.document_fromstring(content)
+        except etree.ParserError:
+            return None
+    if parser == 'html5lib':
+        from lxml.html import html5parser
+
+        # XPath expressions do not use the XHTML namespace
+        return html5parser.document_fromstring(
+            content, parser=html5parser.HTMLParser(namespaceHTMLElements=False))
+    if parser == 'html.parser':
+        from bs4 import SoupStrainer
+        from lxml.html import soupparser
+
+        strainer = SoupStrainer(element[0], attrs=element[1]) if element \
+            else None
+        return soupparser.fromstring(content, features='html.parser',
+                                     parse_only=strainer)
+    raise ValueError(f"parser must be one of {PARSERS}")
+
+
+class TableSpec:
+    """Locations of the parts of a geometry table as XPath expressions.
+
+    Expressions select elements (their text is used) or attribute values.
+    """
+
+    # one argument per part of the table, specs are written with keywords
+    # pylint: disable-next=too-many-arguments
+    def __init__(self, *, table, sizes, rows, label, values, exclude=()):
+        """Describe a geometry table.
+
+        Parameters:
+        -----------
+        table (tuple): the table element in the page as (tag name,
+            attributes), e.g. ('table', {'id': 'geometrie'}), see
+            element_xpath(). With --stream pages are read up to its end.
+        sizes (str): header cells with the frame sizes, relative to table,
+            leading cells that are no frame size, e.g. a 'Size' caption,
+            are skipped by a predicate like [position() > 1]
+        rows (str): elements of the table rows, relative to table
+        label (str or tuple of str): label of a row (the key of col_map),
+            relative to the row, of a tuple the first expression with a
+            non-empty result is used
+        values (str): value cells of a row, one per frame size, relative
+            to the row
+        exclude (tuple of str): classes of elements removed before the
+            extraction, e.g. values in other units ('value-inch')
+        """
+        name, attrs = table
+        self.table = (name, dict(attrs))
+        self.sizes = sizes
+        self.rows = rows
+        self.label = (label,) if isinstance(label, str) else tuple(label)
+        self.values = values
+        self.exclude = tuple(exclude)
+        self._plan = None
+
+    def __getstate__(self):
+        # compiled XPath expressions can not be pickled
+        state = self.__dict__.copy()
+        state['_plan'] = None
+        return state
+
+    def plan(self):
+        """Return the ExtractionPlan, compiled on first use."""
+        if self._plan is None:
+            self._plan = ExtractionPlan(self)
+        return self._plan
+
+
+class ExtractionPlan:
+    """Compiled XPath expressions of a TableSpec."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.table = etree.XPath(element_xpath(*spec.table))
+        self.sizes = etree.XPath(spec.sizes)
+        self.rows = etree.XPath(spec.rows)
+        self.label = [etree.XPath(expr) for expr in spec.label]
+        self.values = etree.XPath(spec.values)
+        self.exclude = None
+        if spec.exclude:
+            self.exclude = etree.XPath(
+                './/*[' + ' or '.join(has_class(c) for c in spec.exclude) + ']')
+
+    def find_table(self, content, url=None, parser='lxml'):
+        """Parse page content with parser and return the table element.
+
+        Raises:
+        -------
+        ValueError if the page has no such table
+        """
+        root = parse_document(content, parser, self.spec.table)
+        found = self.table(root) if root is not None else []
+        if not found:
+            name, attrs = self.spec.table
+            raise ValueError(f"No geometry table {name} {attrs} in {url}")
+        return found[0]
+
+    def frame(self, table):
+        """Return the raw table as DataFrame of strings.
+
+        Frame sizes are the index (MFG_FRAME_KEY), the lower case row labels
+        the columns. Missing values are NaN, values of rows without a label
+        are dropped. Elements with an excluded class are removed from table.
+        """
+        if self.exclude is not None:
+            for element in self.exclude(table):
+                _drop_tree(element)
+        sizes = [_text(cell) for cell in self.sizes(table)]
+
+        labels, rows = [], []
+        for row in self.rows(table):
+            label = self._label(row)
+            if label:
+                labels.append(label.lower())
+                rows.append([_text(cell) for cell in self.values(row)])
+
+        values = np.full((len(sizes), len(rows)), np.nan, dtype=object)
+        for i, cells in enumerate(rows):
+            cells = cells[:len(sizes)]
+            values[:len(cells), i] = cells
+        return pd.DataFrame(
+            values, columns=labels,
+            index=pd.Index(sizes, name=DataImporter.MFG_FRAME_KEY))
+
+    def _label(self, row):
+        for expr in self.label:
+            found = expr(row)
+            if found:
+                label = _text(found[0])
+                if label:
+                    return label
+        return None
+
+
+def _text(node):
+    """Return the stripped text of an element or attribute value."""
+    if isinstance(node, str):
+        return node.strip()
+    # html5lib builds plain etree elements without text_content()
+    return _STRING(node).strip()
+
+
+def _drop_tree(element):
+    """Remove element and its children, keep the text after it."""
+    parent = element.getparent()
+    if element.tail:
+        previous = element.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or '') + element.tail
+        else:
+            parent.text = (parent.text or '') + element.tail
+    parent.remove(element)
+
+
+class SpecImporter(DataImporter):
+    """Importer of an HTML geometry table described by TABLE_SPEC.
+
+    The page is parsed by the parser backend of the importer, the table is
+    always extracted by the compiled spec. The table element of the spec is
+    the GEOMETRY_TABLE of the importer.
+    """
+
+    #: TableSpec of the geometry table
+    TABLE_SPEC = None
+    #: Fingerprints are taken from the lxml source of the table
+    VERSION = 2
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.TABLE_SPEC is not None:
+            cls.GEOMETRY_TABLE = cls.TABLE_SPEC.table
+
+    def extract_table(self, content, url=None):
+        """Return the geometry table element of page content.
+
+        Returns:
+        --------
+        lxml element
+        """
+        return self.TABLE_SPEC.plan().find_table(content, url, self.parser)
+
+    def fingerprint(self, table):
+        return super().fingerprint(lxml.html.tostring(table, encoding='unicode'))
+
+    def parse_table(self, table):
+        """Return the raw table, see ExtractionPlan.frame()."""
+        return self.TABLE_SPEC.plan().frame(table)
+
+    def standardize_data(self, df):
+        """Map raw data to well-known properties."""
+        df = df.rename(columns=self.col_map)
+        # discard all other columns
+        df = df[self.std_cols()]
+        # sizes without any value, e.g. empty cells of a spreadsheet export
+        df = df.dropna(how='all')
+        df = self.make_std_cols_numeric(df)
+        # Return dataframe without index
+        return df.reset_index()
@@ -0,0 +1,176 @@
+#!/bin/env python
+
+import sys
+import time
+from argparse import ArgumentParser
+
+import pandas as pd
+from bikeimport.changes import (PREV_YEAR, SIZE, ChangeCache, summarize,)
+from bikeimport.derived import (TYRE_WIDTH, DerivedCache,)
+from bikeimport.fit import (FitIndex, FitTarget,)
+from bikeimport.globals import normalize
+from bikeimport.numeric import whole_numbers_as_int
+from bikeimport.similarity import (FrameNotFoundError, GeometryIndex,)
+from bikeimport.storage import (FORMATS, open_store,)
+
+def parse(cmdline):
+    parser = ArgumentParser(
+        description='''
+        Compare bike geometries of the standardized database created by
+        scrape.py or import_bikes.py.
+        ''')
+    parser.add_argument("-d", "--database", dest="database",
+                        help="geometry database <FILE>", metavar="<FILE>",
+                        required=True)
+    parser.add_argument("-f", "--format", dest="format",
+                        help="database format (default: csv)",
+                        choices=FORMATS, default='csv')
+    parser.add_argument("-v", "--verbose", dest="verbose",
+                        help="verbose output", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    similar_parser = commands.add_parser(
+        "similar", help="frames with the most similar geometry")
+    similar_parser.add_argument("mfg", help="manufacturer, e.g. giant")
+    similar_parser.add_argument("model", help="model, e.g. tcr")
+    similar_parser.add_argument("year", help="model year", type=int)
+    similar_parser.add_argument("size",
+                                help="manufacturer frame size, e.g. M or 56")
+    similar_parser.add_argument("-k", dest="k",
+                                help="number of frames (default: 10)",
+                                type=int, default=10)
+
+    fit_parser = commands.add_parser(
+        "fit", help="frames matching a target stack and reach")
+    fit_parser.add_argument("--stack", dest="stack",
+                            help="target stack in mm",
+                            type=float, required=True)
+    fit_parser.add_argument("--reach", dest="reach",
+                            help="target reach in mm",
+                            type=float, required=True)
+    fit_parser.add_argument("--stack-tol", dest="stack_tol", type=float,
+                            default=10,
+                            help="accepted stack deviation in mm (default: 10)")
+    fit_parser.add_argument("--reach-tol", dest="reach_tol", type=float,
+                            default=5,
+                            help="accepted reach deviation in mm (default: 5)")
+    fit_parser.add_argument("-c", "--category", dest="category",
+                            help="bike category, e.g. race")
+    fit_parser.add_argument("-y", "--year", dest="year", help="model year",
+                            type=int)
+    fit_parser.add_argument("--spacers", dest="spacers", type=float,
+                            default=0,
+                            help="mm of headset spacers that may be added")
+    fit_parser.add_argument("--stem", dest="stem", type=float, default=0,
+                            help="mm the stem may be longer or shorter")
+    fit_parser.add_argument("-k", dest="k",
+                            help="number of frames (default: 20)",
+                            type=int, default=20)
+
+    derived_parser = commands.add_parser(
+        "derived", help="trail, front center, effective top tube, ratios")
+    derived_parser.add_argument(
+        "--tyre-width", dest="tyre_width", type=float, default=TYRE_WIDTH,
+        help=f"tyre width in mm for trail (default: {TYRE_WIDTH})")
+    derived_parser.add_argument("-o", "--output", dest="output",
+                                help="write derived geometry to <FILE>",
+                                metavar="<FILE>")
+
+    changes_parser = commands.add_parser(
+        "changes", help="geometry changes between model years")
+    changes_parser.add_argument("--mfg", dest="mfg",
+                                help="only this manufacturer")
+    changes_parser.add_argument("--model", dest="model",
+                                help="only this model")
+    changes_parser.add_argument("--sizes", dest="sizes", action="store_true",
+                                help="show the changes of every size")
+    changes_parser.add_argument("--redesigns", dest="redesigns",
+                                action="store_true",
+                                help="only redesigned model years")
+    changes_parser.add_argument("-o", "--output", dest="output",
+                                help="write the report to <FILE>",
+                                metavar="<FILE>")
+    return parser.parse_args(cmdline)
+
+
+def similar(a, db):
+    index = GeometryIndex(db)
+    start = time.perf_counter()
+    try:
+        result = index.similar(a.mfg, a.model, a.year, a.size, k=a.k)
+    except FrameNotFoundError as e:
+        sys.exit(e.args[0])
+    if a.verbose:
+        print(f"searched {len(index)} frames in "
+              f"{(time.perf_counter() - start) * 1e3:.1f} ms")
+    return result
+
+
+def fit(a, db):
+    index = FitIndex(db)
+    start = time.perf_counter()
+    target = FitTarget(a.stack, a.reach, a.stack_tol, a.reach_tol,
+                       spacers=a.spacers, stem=a.stem)
+    result = index.query(target, category=a.category, year=a.year)
+    if a.verbose:
+        print(f"searched {len(index)} frames in "
+              f"{(time.perf_counter() - start) * 1e3:.1f} ms")
+    return result.head(a.k)
+
+
+def derived(a, db):
+    cache = DerivedCache(a.database, a.tyre_width)
+    start = time.perf_counter()
+    result, computed = cache.get(db)
+    if a.verbose:
+        print(f"derived geometry of {len(result.index)} frames "
+              f"({computed} computed) in "
+              f"{(time.perf_counter() - start) * 1e3:.1f} ms")
+    if a.output:
+        whole_numbers_as_int(result).to_csv(a.output)
+    return result
+
+
+def changes(a, db):
+    cache = ChangeCache(a.database)
+    start = time.perf_counter()
+    report, compared = cache.get(db)
+    if a.verbose:
+        print(f"changes of {len(report.index)} sizes ({compared} model years "
+              f"compared) in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    filters = [('mfg', a.mfg), ('model', a.model)]
+    for level, value in filters:
+        if value:
+            report = report[report.index.get_level_values(level) ==
+                            normalize(value)]
+    summary = summarize(report)
+    if a.redesigns:
+        summary = summary[summary['redesign']]
+        years = summary.index.droplevel(PREV_YEAR)
+        report = report[report.index.droplevel(SIZE).isin(years)]
+    result = report.drop(columns='pair') if a.sizes else summary
+    if a.output:
+        whole_numbers_as_int(result).to_csv(a.output)
+    return result
+
+
+COMMANDS = {
+    'similar': similar,
+    'fit': fit,
+    'derived': derived,
+    'changes': changes,
+}
+
+
+def main():
+    a = parse(sys.argv[1:])
+    db = open_store(a.database, a.format).read(typed=True)
+    result = COMMANDS[a.command](a, db)
+    # dimensions are float32, do not print their binary noise
+    with pd.option_context('display.width', 200,
+                           'display.max_columns', None,
+                           'display.precision', 4):
+        print(result)
+
+if __name__ == '__main__':
+    main()
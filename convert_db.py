@@ -0,0 +1,32 @@
+#!/bin/env python
+
+import sys
+from argparse import ArgumentParser
+from bikeimport.storage import (FORMATS, convert,)
+
+def parse(cmdline):
+    parser = ArgumentParser(
+        description='''
+        Convert the geometry database to another storage format, e.g. the
+        CSV database to a Parquet dataset partitioned by manufacturer and
+        year.
+        ''')
+    parser.add_argument("-s", "--source", dest="source",
+                        help="existing database", required=True)
+    parser.add_argument("-d", "--dest", dest="dest",
+                        help="new database <FILE/DIR>", metavar="<FILE/DIR>",
+                        required=True)
+    parser.add_argument("--from", dest="source_format",
+                        choices=FORMATS, default='csv')
+    parser.add_argument("--to", dest="dest_format",
+                        choices=FORMATS, default='parquet')
+    return parser.parse_args(cmdline)
+
+
+def main():
+    a = parse(sys.argv[1:])
+    rows = convert(a.source, a.dest, a.source_format, a.dest_format)
+    print(f"converted {rows} rows from {a.source} to {a.dest}")
+
+if __name__ == '__main__':
+    main()
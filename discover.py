@@ -0,0 +1,121 @@
+#!/bin/env python
+
+import csv
+import sys
+import time
+from argparse import ArgumentParser
+
+from bikeimport import importer_class
+from bikeimport.discovery import (URL_COLUMNS, CatalogCrawler, CrawlLimits,
+                                  url_hash,)
+
+def parse(cmdline):
+    parser = ArgumentParser(
+        description='''
+        This program discovers model pages in the catalogs of manufacturers
+        and writes them as url list for scrape.py.
+
+        The expected input is a comma-separated-values (CSV) file of catalog
+        (category) pages with the columns 'year', 'mfg', 'category', 'url'.
+        Found models get year, mfg and category of the catalog page.
+        ''')
+
+    parser.add_argument("-s", "--source", dest="source",
+                        help="catalog pages (csv file) to start from",
+                        metavar="<FILE>", required=True)
+
+    parser.add_argument("-o", "--output", dest="output",
+                        help="write the url list to <FILE> (default: stdout)",
+                        metavar="<FILE>")
+
+    parser.add_argument("-k", "--known", dest="known",
+                        help="url list, e.g. all-urls.csv, models listed in "
+                        "<FILE> are not written", metavar="<FILE>")
+
+    parser.add_argument("-w", "--workers", dest="workers",
+                        help="fetch up to <N> catalog pages concurrently",
+                        metavar="<N>", type=int, default=4)
+
+    parser.add_argument("--per-host", dest="per_host",
+                        help="fetch up to <N> pages of one host concurrently",
+                        metavar="<N>", type=int, default=2)
+
+    parser.add_argument("--delay", dest="delay",
+                        help="seconds between two requests to the same host",
+                        type=float, default=1.0)
+
+    parser.add_argument("--max-pages", dest="max_pages",
+                        help="fetch at most <N> catalog pages",
+                        metavar="<N>", type=int, default=1000)
+
+    parser.add_argument("--max-depth", dest="max_depth",
+                        help="follow links up to <N> pages deep from a start "
+                        "page", metavar="<N>", type=int, default=3)
+
+    parser.add_argument("--frontier-size", dest="frontier_size",
+                        help="queue at most <N> pages, further links are "
+                        "dropped", metavar="<N>", type=int, default=10000)
+
+    parser.add_argument("-v", "--verbose", dest="verbose",
+                        help="verbose output", action="store_true")
+    return parser.parse_args(cmdline)
+
+
+def read_catalogs(path):
+    """Return the catalog pages of path with the CatalogSpec of the mfg."""
+    catalogs = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            spec = importer_class(row['mfg']).CATALOG_SPEC
+            if spec is None:
+                raise ValueError(f"{row['mfg']}: models can not be discovered")
+            catalogs.append({**row, 'year': int(row['year']), 'spec': spec})
+    return catalogs
+
+
+def known_urls(path):
+    """Return the url hashes of a url list."""
+    with open(path, newline='', encoding='utf-8') as f:
+        return {url_hash(row['url']) for row in csv.DictReader(f)}
+
+
+def write_urls(out, rows):
+    """Write the found models as url list to the file object out."""
+    writer = csv.DictWriter(out, fieldnames=URL_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main():
+    a = parse(sys.argv[1:])
+    catalogs = read_catalogs(a.source)
+
+    def progress(url):
+        if a.verbose:
+            print(f"{crawler.fetched} pages\t{url}", file=sys.stderr)
+
+    limits = CrawlLimits(workers=a.workers, per_host=a.per_host,
+                         delay=a.delay, max_pages=a.max_pages,
+                         max_depth=a.max_depth, frontier_size=a.frontier_size)
+    crawler = CatalogCrawler(limits, progress=progress)
+    start = time.perf_counter()
+    rows = crawler.crawl(catalogs)
+    if a.known:
+        known = known_urls(a.known)
+        rows = [row for row in rows if url_hash(row['url']) not in known]
+
+    for url, error in crawler.failed:
+        print(f"failed {url}: {error}", file=sys.stderr)
+    if a.verbose:
+        print(f"{len(rows)} models on {crawler.fetched} pages in "
+              f"{time.perf_counter() - start:.1f}s, "
+              f"{crawler.dropped} links dropped", file=sys.stderr)
+
+    if a.output:
+        with open(a.output, 'w', newline='', encoding='utf-8') as f:
+            write_urls(f, rows)
+    else:
+        write_urls(sys.stdout, rows)
+
+if __name__ == '__main__':
+    main()
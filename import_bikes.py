@@ -1,14 +1,24 @@
 #!/bin/env python
 
+import csv
+import glob
+import os
 import sys
-import os.path
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from bikeimport import (
     available_importer_names,
     instantiate_importer
     )
+from bikeimport.globals import (
+    CONFLICT_POLICIES,
+    DB_FORMATS,
+    normalize,
+    )
 from argparse import ArgumentParser
 
+#: Manifest file name in --source-dir
+MANIFEST = 'manifest.csv'
+
 def parse(cmdline):
     parser = ArgumentParser(
         description='''
@@ -40,29 +50,145 @@ def parse(cmdline):
                         help="product year",
                         type=int)
 
-    parser.add_argument("-S", "--source-dir", dest="src-dir",
-                        help="read all files from directory <DIR>",
+    parser.add_argument("-S", "--source-dir", dest="source_dir",
+                        help="read all files from directory <DIR>, mfg, "
+                        "model and year are taken from <DIR>/manifest.csv "
+                        "or from file names <mfg>_<model>[_<year>].csv",
                         metavar="<DIR>")
 
+    parser.add_argument("--pattern", dest="pattern",
+                        help="file name pattern in --source-dir "
+                        "(default: *.csv)", default="*.csv")
+
+    parser.add_argument("-p", "--processes", dest="processes",
+                        help="standardize files in <N> processes "
+                        "(default: number of cores)",
+                        metavar="<N>", type=int)
+
+    parser.add_argument("--on-conflict", dest="on_conflict",
+                        help="models already in the database are replaced "
+                        "(default), kept or abort the import (error)",
+                        choices=CONFLICT_POLICIES, default='replace')
+
+    parser.add_argument("-f", "--format", dest="format",
+                        help="database format (default: csv)",
+                        choices=DB_FORMATS, default='csv')
+
     parser.add_argument("-v", "--verbose", dest="verbose",
                         help="verbose output", action="store_true")
-    return parser.parse_args(cmdline)
+    a = parser.parse_args(cmdline)
+    if bool(a.source) == bool(a.source_dir):
+        parser.error("either --source or --source-dir is required")
+    if a.source and not a.mfg:
+        parser.error("--source requires --mfg")
+    return a
+
+
+def job_from_name(path, year=None):
+    """Return the import job of a file named <mfg>_<model>[_<year>].ext.
+
+    Raises:
+    -------
+    ValueError if the name does not start with a known manufacturer
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    mfg, *parts = stem.split('_')
+    if normalize(mfg) not in available_importer_names() or not parts:
+        raise ValueError(f"{path}: expected <mfg>_<model>[_<year>] with mfg "
+                         f"one of {', '.join(available_importer_names())}")
+    if len(parts) > 1 and parts[-1].isdigit() and len(parts[-1]) == 4:
+        year = int(parts.pop())
+    return {'source': path, 'mfg': mfg, 'model': ' '.join(parts),
+            'year': year, 'category': None}
+
+
+def read_manifest(path):
+    """Return the import jobs of a manifest.
+
+    The manifest is a csv file with the columns 'file', 'mfg', 'model' and
+    optionally 'year' and 'category', files are relative to the manifest.
+    """
+    jobs = []
+    directory = os.path.dirname(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            jobs.append({
+                'source': os.path.join(directory, row['file']),
+                'mfg': row['mfg'],
+                'model': row['model'],
+                'year': int(row['year']) if row.get('year') else None,
+                'category': row.get('category') or None,
+            })
+    return jobs
+
+
+def find_jobs(directory, pattern='*.csv', year=None, database=None):
+    """Return import jobs for all files in directory, sorted by file name.
+
+    Files listed in directory/manifest.csv are imported as given there,
+    all other files matching pattern by their name. Files with other names
+    are skipped with a warning, the manifest, the database and the caches
+    next to it (e.g. database.csv.derived.csv) are skipped silently.
+    """
+    manifest = os.path.join(directory, MANIFEST)
+    jobs = read_manifest(manifest) if os.path.exists(manifest) else []
+    skip = {os.path.abspath(manifest)}
+    skip.update(os.path.abspath(job['source']) for job in jobs)
+    database = os.path.abspath(database) if database else None
+    for path in sorted(glob.glob(os.path.join(directory, pattern))):
+        path = os.path.normpath(path)
+        full = os.path.abspath(path)
+        if full in skip or (database and (
+                full == database or full.startswith(database + '.'))):
+            continue
+        try:
+            jobs.append(job_from_name(path, year))
+        except ValueError as e:
+            print(f"skipped {e}", file=sys.stderr)
+    return jobs
+
+
+def import_file(job, verbose=False):
+    """Import, standardize and annotate the file of job."""
+    importer = instantiate_importer(job['mfg'], verbose=verbose)
+    data = importer.scrape(job['source'])
+    data = importer.standardize_data(data)
+    return importer.append_meta_info(data, model=job['model'],
+                                     year=job['year'],
+                                     category=job['category'])
 
 
 def main():
     a = parse(sys.argv[1:])
-    importer = instantiate_importer(a.mfg, a.model, a.year, verbose=a.verbose)
-    print(f"using {importer}")
+    # pandas is loaded here, not for --help
+    # pylint: disable=import-outside-toplevel
+    from bikeimport.storage import open_store
 
-    importer.import_data(a.source)
-    data = importer.get_data()
+    import pandas as pd
 
-    if os.path.exists(a.database):
-        db = pd.read_csv(a.database, header=0, index_col=[0, 1, 2, 3])
-        db_new = pd.concat([db, data])
+    if a.source:
+        jobs = [{'source': a.source, 'mfg': a.mfg, 'model': a.model,
+                 'year': a.year, 'category': None}]
     else:
-        db_new = data
-    db_new.to_csv(a.database, mode='w+')
+        jobs = find_jobs(a.source_dir, a.pattern, a.year, a.database)
+        print(f"importing {len(jobs)} files from {a.source_dir}")
+
+    if len(jobs) == 1 or a.processes == 1:
+        frames = [import_file(job, a.verbose) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=a.processes) as pool:
+            # results in the order of jobs
+            frames = list(pool.map(import_file, jobs,
+                                   [a.verbose] * len(jobs)))
+    if a.verbose:
+        for job, df in zip(jobs, frames):
+            print(f"{job['source']}: {len(df.index)} rows")
+    if not frames:
+        return
+
+    # one write for all files, the database is not loaded
+    open_store(a.database, a.format).append(
+        pd.concat(frames), on_conflict=a.on_conflict)
 
 if __name__ == '__main__':
     main()
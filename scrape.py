@@ -1,14 +1,20 @@
 #!/bin/env python
 
+import multiprocessing
+import queue
 import sys
-import os.path
-import time
+from concurrent.futures import (Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor,)
 
 from argparse import ArgumentParser
-import pandas as pd
 from bikeimport import (
     instantiate_importer
     )
+from bikeimport.cache import ResponseCache
+from bikeimport.fingerprints import FingerprintStore
+from bikeimport.globals import (CONFLICT_POLICIES, DB_FORMATS,)
+from bikeimport.metrics import (Metrics, NULL_METRICS,)
+from bikeimport.scheduler import map_by_host
 
 def parse(cmdline):
     parser = ArgumentParser(
@@ -31,44 +37,439 @@ def parse(cmdline):
                         help="data source file (csv file) with urls",
                         required=True)
 
+    parser.add_argument("-w", "--workers", dest="workers",
+                        help="scrape up to <N> manufacturer hosts concurrently",
+                        metavar="<N>", type=int, default=1)
+
+    parser.add_argument("-p", "--processes", dest="processes",
+                        help="parse and standardize pages in <N> processes "
+                        "while further pages are downloaded",
+                        metavar="<N>", type=int, default=0)
+
+    parser.add_argument("--delay", dest="delay",
+                        help="seconds between two requests to the same host",
+                        type=float, default=1.0)
+
+    parser.add_argument("--cache-dir", dest="cache_dir",
+                        help="cache downloaded pages in <DIR>, "
+                        "unchanged pages are revalidated, not downloaded",
+                        metavar="<DIR>")
+
+    parser.add_argument("--offline", dest="offline",
+                        help="do not access the network, scrape cached "
+                        "pages from --cache-dir only", action="store_true")
+
+    parser.add_argument("--cache-fresh-for", dest="cache_fresh_for",
+                        help="use cached pages younger than <HOURS> without "
+                        "revalidating them", metavar="<HOURS>", type=float)
+
+    parser.add_argument("--cache-max-age", dest="cache_max_age",
+                        help="evict cached pages unused for <DAYS>",
+                        metavar="<DAYS>", type=float)
+
+    parser.add_argument("--cache-max-size", dest="cache_max_size",
+                        help="limit the cache to <MB> megabytes",
+                        metavar="<MB>", type=float)
+
+    parser.add_argument("--stream", dest="stream",
+                        help="stop downloading a page once its geometry "
+                        "table is complete", action="store_true")
+
+    parser.add_argument("--parser", dest="parser",
+                        help="html parser backend (default: lxml)",
+                        choices=['lxml', 'html.parser', 'html5lib'])
+
+    parser.add_argument("--pool-size", dest="pool_size",
+                        help="keep-alive connections per host",
+                        metavar="<N>", type=int, default=4)
+
+    parser.add_argument("--retries", dest="retries",
+                        help="retry failed requests <N> times",
+                        metavar="<N>", type=int, default=3)
+
+    parser.add_argument("--on-conflict", dest="on_conflict",
+                        help="models already in the database are replaced "
+                        "(default), kept or abort the import (error)",
+                        choices=CONFLICT_POLICIES, default='replace')
+
+    parser.add_argument("-f", "--format", dest="format",
+                        help="database format (default: csv)",
+                        choices=DB_FORMATS, default='csv')
+
+    parser.add_argument("-i", "--incremental", dest="incremental",
+                        help="skip pages whose geometry did not change since "
+                        "the last run, fingerprints are kept in <FILE>",
+                        metavar="<FILE>")
+
+    parser.add_argument("-j", "--journal", dest="journal",
+                        help="save every finished record to <DIR>, failed "
+                        "records go to <DIR>/failed.csv instead of "
+                        "aborting the run", metavar="<DIR>")
+
+    parser.add_argument("--resume", dest="resume",
+                        help="continue an interrupted run from --journal",
+                        action="store_true")
+
+    parser.add_argument("--metrics-json", dest="metrics_json",
+                        help="write per-stage timings, bytes and rows of "
+                        "the run to <FILE>", metavar="<FILE>")
+
+    parser.add_argument("--metrics-prom", dest="metrics_prom",
+                        help="write the run metrics as Prometheus textfile "
+                        "<FILE>", metavar="<FILE>")
+
     parser.add_argument("-v", "--verbose", dest="verbose",
                         help="verbose output", action="store_true")
-    return parser.parse_args(cmdline)
+    a = parser.parse_args(cmdline)
+    if a.offline and not a.cache_dir:
+        parser.error("--offline requires --cache-dir")
+    if a.cache_fresh_for and not a.cache_dir:
+        parser.error("--cache-fresh-for requires --cache-dir")
+    if a.stream and a.cache_dir:
+        parser.error("--stream can not be used with --cache-dir")
+    if a.resume and not a.journal:
+        parser.error("--resume requires --journal")
+    if a.incremental and not a.database:
+        parser.error("--incremental requires --dest")
+    return a
 
 
-def main():
-    a = parse(sys.argv[1:])
-    if a.database and os.path.exists(a.database):
-        db = pd.read_csv(a.database, header=0, index_col=[0, 1, 2, 3])
-    else:
-        db = pd.DataFrame()
+def open_cache(a):
+    """Return the response cache configured on the command line or None."""
+    if not a.cache_dir:
+        return None
+    return ResponseCache(
+        a.cache_dir,
+        offline=a.offline,
+        fresh_for=a.cache_fresh_for * 3600 if a.cache_fresh_for else 0,
+        max_age=a.cache_max_age * 86400 if a.cache_max_age else None,
+        max_size=int(a.cache_max_size * 2**20) if a.cache_max_size else None)
 
-    to_scrape = pd.read_csv(a.source, header=0)
-    records = to_scrape.to_dict(orient='records')
-    total = len(to_scrape.index)
-    i=1
-    for record in records:
-        print(
-            f"{i}/{total}\t{record['mfg']} {record['model']} {record['year']}",
-            end='')
 
-        importer = instantiate_importer(record['mfg'])
-        df = importer.scrape(record['url'])
+def fetch_record(record, metrics=NULL_METRICS, **kwargs):
+    """Download the page of record, kwargs are forwarded to the importer."""
+    mfg = record['mfg']
+    importer = instantiate_importer(mfg, **kwargs)
+    with metrics.timer('fetch', mfg):
+        content = importer.fetch(record['url'])
+    metrics.count('pages', mfg)
+    metrics.count('bytes', mfg, len(content))
+    return content
+
+
+def process_record(record, content, incremental=False, known=None,
+                   metrics=NULL_METRICS, **kwargs):
+    """Parse, standardize and annotate the downloaded page of record.
+
+    In incremental mode the fingerprint of the geometry table is computed,
+    if it equals the known fingerprint the page is not parsed further and
+    None is returned as frame.
+    Every stage is timed with metrics.
+    kwargs are forwarded to the importer.
+
+    Returns:
+    --------
+    (pandas.DataFrame, str): frame and fingerprint (None if not incremental)
+    """
+    mfg = record['mfg']
+    importer = instantiate_importer(mfg, **kwargs)
+    with metrics.timer('parse', mfg):
+        table = importer.extract_table(content, record['url'])
+    fingerprint = None
+    if incremental:
+        fingerprint = importer.fingerprint(table)
+        if fingerprint == known:
+            metrics.count('unchanged', mfg)
+            return None, fingerprint
+    with metrics.timer('table', mfg):
+        df = importer.parse_table(table)
+    with metrics.timer('standardize', mfg):
         df = importer.standardize_data(df)
+    with metrics.timer('meta', mfg):
         df = importer.append_meta_info(df,
             model=record['model'],
             category=record['category'],
             year=record['year'])
-        db = pd.concat([db,df])
+    metrics.count('rows', mfg, len(df.index))
+    return df, fingerprint
+
+
+def process_in_worker(record, content, incremental, known, measure, **kwargs):
+    """process_record() in a worker process, returns its metrics too."""
+    metrics = Metrics() if measure else NULL_METRICS
+    df, fingerprint = process_record(record, content, incremental, known,
+                                     metrics, **kwargs)
+    return df, fingerprint, metrics
+
+
+def scrape_record(record, fingerprints=None, metrics=NULL_METRICS, **kwargs):
+    """Scrape, standardize and annotate the model given by record.
+
+    With fingerprints, pages whose geometry table did not change since the
+    last import are skipped before parsing and None is returned.
+    Every stage is timed with metrics.
+    kwargs are forwarded to the importer.
+    """
+    content = fetch_record(record, metrics, **kwargs)
+    known = fingerprints.get(record) if fingerprints else None
+    df, fingerprint = process_record(record, content, bool(fingerprints),
+                                     known, metrics, **kwargs)
+    if df is not None and fingerprints:
+        fingerprints.set(record, fingerprint)
+    return df
+
+
+class ScrapeRun:
+    """Options and shared state of one scrape.py run.
+
+    Scrapes the records todo with the response cache, fingerprints and
+    metrics of the command line options a, results are collected with
+    finish() and saved to the journal.
+    """
+
+    def __init__(self, a, todo, journal=None):
+        """Set up the run of the records todo."""
+        self.a = a
+        self.todo = todo
+        self.journal = journal
+        self.done = 0
+        self.cache = open_cache(a)
+        self.fingerprints = (FingerprintStore(a.incremental) if a.incremental
+                             else None)
+        self.metrics = (Metrics() if a.metrics_json or a.metrics_prom
+                        else NULL_METRICS)
+
+    @property
+    def delay(self):
+        """Seconds between two requests to the same host."""
+        # Delay between requests to the same host so the scraper will not be
+        # banned, different hosts are scraped concurrently with --workers
+        # Cached pages do not hit the network, no need to wait in offline mode
+        return 0 if self.a.offline else self.a.delay
+
+    @property
+    def importer_options(self):
+        """Keyword arguments of the importers fetching pages."""
+        return {'cache': self.cache, 'stream': self.a.stream,
+                'parser': self.a.parser}
 
-        time.sleep(1) # Sleep so the scraper will not be banned
-        i=i+1
-        print(" "*100+ "\r", end='')
+    def progress(self, record):
+        """Show that record is finished.
+
+        Not thread safe, map_by_host() and scrape_in_processes() call it
+        from one thread at a time.
+        """
+        self.done += 1
+        print(" "*100 + "\r", end='')
+        print(
+            f"{self.done}/{len(self.todo)}\t{record['mfg']} {record['model']} {record['year']}",
+            end='\r')
+
+    def finish(self, record, scrape):
+        """Return the frame of record computed by scrape().
+
+        With a journal the frame is saved, a failing record is put on the
+        retry list and None is returned instead of aborting the run.
+        """
+        try:
+            df = scrape()
+        except Exception as e:  # pylint: disable=broad-except
+            self.metrics.count('failed', record['mfg'])
+            if not self.journal:
+                raise
+            # put on retry list, do not abort the batch
+            self.journal.fail(record, e)
+            return None
+        if self.journal:
+            self.journal.save(record, df)
+        return df
+
+    def scrape(self, record):
+        """Scrape record in this thread, see scrape_record()."""
+        return self.finish(record, lambda: scrape_record(
+            record, self.fingerprints, self.metrics,
+            **self.importer_options))
+
+
+def open_process_pool(processes):
+    """Return a pool of processes workers, safe to feed from threads.
+
+    The pool starts its workers on demand, i.e. in the download threads.
+    Workers forked from there inherit locks other threads hold at that
+    moment, e.g. the import lock of an importer module, and hang for good.
+    They are started from a single threaded forkserver instead (spawned
+    where there is none).
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        'forkserver' if 'forkserver' in methods else 'spawn')
+    return ProcessPoolExecutor(max_workers=processes, mp_context=context)
+
+
+def submit_record(run, pool, record):
+    """Download the page of record and submit its processing to pool.
+
+    Returns:
+    --------
+    concurrent.futures.Future of process_in_worker(), holds the error if
+    the download failed
+    """
+    try:
+        content = fetch_record(record, run.metrics, **run.importer_options)
+    except Exception as e:  # pylint: disable=broad-except
+        future = Future()
+        future.set_exception(e)
+        return future
+    known = run.fingerprints.get(record) if run.fingerprints else None
+    return pool.submit(process_in_worker, record, content,
+                       bool(run.fingerprints), known,
+                       isinstance(run.metrics, Metrics),
+                       parser=run.a.parser)
+
+
+def collect_record(run, record, future):
+    """Return the frame of a record processed in the pool."""
+    df, fingerprint, worker_metrics = future.result()
+    run.metrics.merge(worker_metrics)
+    if df is not None and run.fingerprints:
+        run.fingerprints.set(record, fingerprint)
+    return df
+
+
+def scrape_in_processes(run):
+    """Download pages in threads and process them in a process pool.
+
+    Pages are handed to the pool as soon as they are downloaded, parsing
+    and standardizing runs on --processes cores meanwhile. Every result is
+    collected with run.finish() in this thread as soon as the record is
+    processed, so the journal keeps up with the run. Results are returned
+    in the order of run.todo.
+    """
+    # (record, future) of every processed record, None once all pages are
+    # downloaded
+    processed = queue.Queue()
+
+    def submit(record):
+        future = submit_record(run, pool, record)
+        future.add_done_callback(lambda f: processed.put((record, f)))
+        return future
+
+    with open_process_pool(run.a.processes) as pool, \
+            ThreadPoolExecutor(max_workers=1) as downloader:
+        downloads = downloader.submit(map_by_host, submit, run.todo,
+                                      workers=run.a.workers, delay=run.delay)
+        downloads.add_done_callback(lambda f: processed.put(None))
+
+        position = {id(record): i for i, record in enumerate(run.todo)}
+        results = [None] * len(run.todo)
+        for _ in run.todo:
+            item = processed.get()
+            while item is None:
+                # re-raise an error of the download threads
+                downloads.result()
+                item = processed.get()
+            record, future = item
+            results[position[id(record)]] = run.finish(
+                record, lambda r=record, f=future: collect_record(run, r, f))
+            run.progress(record)
+        return results
+
+
+def open_journal(a, records):
+    """Return the journal of --journal (or None) and the records to scrape,
+    with --resume records finished in a previous run are left out."""
+    if not a.journal:
+        return None, records
+    # pylint: disable=import-outside-toplevel
+    from bikeimport.journal import RunJournal
+
+    journal = RunJournal(a.journal)
+    if not a.resume:
+        journal.clear_done()
+        return journal, records
+    todo = [r for r in records if not journal.is_done(r)]
+    print(f"resuming, {len(records) - len(todo)} of {len(records)} records "
+          f"done")
+    return journal, todo
+
+
+def close_journal(journal, failed):
+    """Report failed records, remove the journal if none failed."""
+    journal.clear_done()
+    if not failed:
+        journal.remove()
+        return
+    print(f"\n{len(failed)} records failed, retry them with "
+          f"-s {journal.failed_path}")
+    for record in failed:
+        print(f"  {record['mfg']} {record['model']} {record['year']}: "
+              f"{record['error']}")
+
+
+def write_metrics(a, metrics):
+    """Write the run report files given on the command line."""
+    if a.metrics_json:
+        metrics.write_json(a.metrics_json)
+    if a.metrics_prom:
+        metrics.write_prometheus(a.metrics_prom)
+
+
+def store_results(a, db, metrics, fingerprints):
+    """Append the scraped rows to the database of --dest."""
+    # pylint: disable=import-outside-toplevel
+    from bikeimport.storage import open_store
+
+    # only the new rows are written, the database is not loaded
+    with metrics.timer('write', 'all'):
+        open_store(a.database, a.format).append(
+            db, on_conflict=a.on_conflict)
+    # fingerprints are only valid once their rows are stored
+    if fingerprints:
+        fingerprints.commit()
+
+
+def main():
+    a = parse(sys.argv[1:])
+    # pandas and requests are loaded here, not for --help
+    # pylint: disable=import-outside-toplevel
+    import pandas as pd
+    from bikeimport import session
+
+    session.configure(pool_size=a.pool_size, retries=a.retries)
+    to_scrape = pd.read_csv(a.source, header=0)
+    records = to_scrape.to_dict(orient='records')
+    journal, todo = open_journal(a, records)
+    run = ScrapeRun(a, todo, journal)
+
+    if a.processes:
+        frames = scrape_in_processes(run)
+    else:
+        frames = map_by_host(run.scrape, todo,
+                             workers=a.workers,
+                             delay=run.delay,
+                             progress=run.progress)
+    failed = journal.failed() if journal else []
+    if a.verbose and run.fingerprints:
+        unchanged = sum(df is None for df in frames) - len(failed)
+        print(f"\n{unchanged} of {len(todo)} pages unchanged")
+    if journal:
+        # records finished in previous runs and this run, in input order
+        frames = journal.results(records)
+    # unchanged pages are skipped in incremental mode
+    frames = [df for df in frames if df is not None]
+    db = pd.concat(frames) if frames else pd.DataFrame()
+    session.close_sessions()
+    if run.cache:
+        run.cache.evict()
 
     if a.database:
-        db.to_csv(a.database, mode='w+')
+        store_results(a, db, run.metrics, run.fingerprints)
     else:
         print(db)
 
+    if journal:
+        close_journal(journal, failed)
+    write_metrics(a, run.metrics)
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,53 @@
+#!/bin/env python
+
+import asyncio
+import sys
+from argparse import ArgumentParser
+
+from bikeimport.globals import DB_FORMATS
+
+def parse(cmdline):
+    parser = ArgumentParser(
+        description='''
+        Serve lookups and comparisons of the standardized database created
+        by scrape.py or import_bikes.py over HTTP. The database is kept in
+        memory and reloaded when it changes.
+        ''')
+    parser.add_argument("-d", "--database", dest="database",
+                        help="geometry database <FILE>", metavar="<FILE>",
+                        required=True)
+    parser.add_argument("-f", "--format", dest="format",
+                        help="database format (default: csv)",
+                        choices=DB_FORMATS, default='csv')
+    parser.add_argument("--host", dest="host", default="127.0.0.1",
+                        help="listen address (default: 127.0.0.1)")
+    parser.add_argument("-p", "--port", dest="port", type=int, default=8000,
+                        help="listen port (default: 8000)")
+    parser.add_argument("--cache-size", dest="cache_size", type=int,
+                        default=4096, metavar="<N>",
+                        help="cache <N> responses (default: 4096)")
+    parser.add_argument("--check-interval", dest="check_interval",
+                        type=float, default=1.0, metavar="<SECONDS>",
+                        help="check the database for changes every "
+                        "<SECONDS> (default: 1)")
+    return parser.parse_args(cmdline)
+
+
+def main():
+    a = parse(sys.argv[1:])
+    # pandas is loaded here, not for --help
+    # pylint: disable=import-outside-toplevel
+    from bikeimport.server import (GeometryService, serve,)
+
+    service = GeometryService(a.database, a.format,
+                              cache_size=a.cache_size,
+                              check_interval=a.check_interval)
+    print(f"serving {len(service.db.index)} frames on "
+          f"http://{a.host}:{a.port}/")
+    try:
+        asyncio.run(serve(service, a.host, a.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()